@@ -0,0 +1,96 @@
+"""Shared Silero VAD and startup-latency metric for the LiveKit workers.
+
+The VAD's ONNX model is loaded once per worker process, from ``prewarm``
+before any job is assigned, and the same instance (one inference session
+shared by all its streams) is handed to every job that process runs.
+``StartupTimer`` measures how long a job takes from being assigned to the
+process until the agent's first audio, which is the greeting.
+"""
+import asyncio
+import logging
+import statistics
+import threading
+import time
+
+from livekit.agents import JobContext, JobProcess
+from livekit.plugins import silero
+
+logger = logging.getLogger("agent_startup")
+
+_vad = None
+_vad_lock = threading.Lock()
+# first-audio latencies of the jobs this process has run, in seconds
+_startup_history: list[float] = []
+
+
+def shared_vad() -> silero.VAD:
+    """The process-wide Silero VAD, loaded on first use."""
+    global _vad
+    with _vad_lock:
+        if _vad is None:
+            start = time.perf_counter()
+            _vad = silero.VAD.load()
+            logger.info(f"Silero VAD loaded in {(time.perf_counter() - start) * 1000:.0f} ms")
+        return _vad
+
+
+def prewarm(proc: JobProcess):
+    try:
+        proc.userdata["vad"] = shared_vad()
+        logger.info("Silero VAD prewarmed successfully")
+    except Exception:
+        logger.exception("Failed to prewarm Silero VAD")
+        # store a sentinel so callers can detect failure
+        proc.userdata["vad"] = None
+
+
+async def job_vad(ctx: JobContext) -> silero.VAD | None:
+    """The prewarmed VAD, or one loaded now (and kept for later jobs) if prewarm did not run.
+
+    The fallback load runs in a thread so it does not block the job's event loop.
+    """
+    vad = ctx.proc.userdata.get("vad")
+    if vad is not None:
+        return vad
+    try:
+        vad = ctx.proc.userdata["vad"] = await asyncio.to_thread(shared_vad)
+    except Exception:
+        logger.exception("Failed to load Silero VAD")
+    return vad
+
+
+class StartupTimer:
+    """Time from job assignment (entrypoint start) to the agent's first audio.
+
+    Create it first thing in the entrypoint, ``mark`` the steps in between and
+    ``attach`` it to the session; the breakdown is logged when the agent
+    starts speaking for the first time.
+    """
+
+    def __init__(self, ctx: JobContext):
+        self.started = time.perf_counter()
+        self.room = ctx.room.name
+        self.prewarmed = ctx.proc.userdata.get("vad") is not None
+        self.marks: dict[str, float] = {}
+
+    def mark(self, step: str) -> None:
+        self.marks.setdefault(step, time.perf_counter() - self.started)
+
+    def attach(self, session) -> None:
+        def on_agent_state_changed(event):
+            if getattr(event, "new_state", None) == "speaking" and "first_audio" not in self.marks:
+                self.mark("first_audio")
+                self.report()
+
+        session.on("agent_state_changed", on_agent_state_changed)
+
+    def report(self) -> None:
+        first_audio = self.marks["first_audio"]
+        _startup_history.append(first_audio)
+        steps = ", ".join(f"{step} {seconds * 1000:.0f} ms" for step, seconds in self.marks.items() if step != "first_audio")
+        jobs = len(_startup_history)
+        logger.info(
+            f"startup: first audio {first_audio * 1000:.0f} ms after job start in room {self.room} "
+            f"({steps}; VAD {'prewarmed' if self.prewarmed else 'loaded by this job'}; "
+            f"job {jobs} in this process, median {statistics.median(_startup_history) * 1000:.0f} ms)"
+        )
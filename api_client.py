@@ -0,0 +1,163 @@
+import collections
+import random
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeout
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+import httpx
+import openai
+from openai import NOT_GIVEN, OpenAI
+
+T = TypeVar("T")
+
+# transient failures worth another attempt; 4xx errors other than 429 are not
+RETRYABLE_ERRORS = (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)
+
+
+def build_client(
+    api_key: str,
+    base_url: str | None = None,
+    max_connections: int = 20,
+    keepalive_connections: int = 10,
+    keepalive_expiry: float = 60.0,
+    connect_timeout: float = 5.0,
+) -> OpenAI:
+    """Create the one OpenAI client shared by every stage.
+
+    The underlying httpx pool keeps connections alive between turns so later
+    requests skip DNS/TLS setup. SDK-level retries are disabled because
+    ApiCaller applies its own per-stage retry policy.
+    """
+    http_client = openai.DefaultHttpxClient(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(60.0, connect=connect_timeout),
+    )
+    return OpenAI(api_key=api_key, base_url=base_url, http_client=http_client, max_retries=0)
+
+
+def warm_connection(client: OpenAI, timeout: float = 5.0) -> float | None:
+    """Open a pooled connection to the API ahead of the first real request.
+
+    A cheap authenticated GET pays for DNS, TCP and TLS setup; the connection
+    stays in the keep-alive pool for the next request. Returns the seconds it
+    took, or None if the request failed (the real request then connects itself).
+    """
+    start = time.perf_counter()
+    try:
+        client.models.with_raw_response.list(timeout=timeout)
+    except Exception:
+        return None
+    return time.perf_counter() - start
+
+
+@dataclass
+class StagePolicy:
+    timeout: float = 30.0
+    retries: int = 2
+    hedge: bool = False
+
+
+class ApiCaller:
+    """Apply timeouts, jittered exponential backoff and request hedging per stage.
+
+    ``call(stage, request)`` invokes ``request(timeout)``. For stages with
+    hedging enabled, a duplicate request is started if the first has not
+    finished after the stage's recent p95 latency (or ``hedge_after`` seconds
+    if given), and whichever succeeds first wins.
+    """
+
+    def __init__(
+        self,
+        policies: dict[str, StagePolicy],
+        backoff_base: float = 0.25,
+        backoff_max: float = 4.0,
+        hedge_after: float | None = None,
+        hedge_min_samples: int = 20,
+        hedge_quantile: float = 0.95,
+    ):
+        self.policies = policies
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_after = hedge_after
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_quantile = hedge_quantile
+        self.retries = collections.Counter()
+        self.hedges = collections.Counter()
+        self._latencies: dict[str, collections.deque] = collections.defaultdict(lambda: collections.deque(maxlen=200))
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hedge")
+
+    def hedge_delay(self, stage: str) -> float | None:
+        if self.hedge_after is not None:
+            return self.hedge_after
+        with self._lock:
+            samples = sorted(self._latencies[stage])
+        if len(samples) < self.hedge_min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * self.hedge_quantile))]
+
+    def _backoff(self, attempt: int) -> float:
+        # "full jitter": spreads concurrent retries instead of synchronizing them
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _hedged(self, stage: str, request: Callable[[Any], T], timeout: float) -> T:
+        delay = self.hedge_delay(stage)
+        if delay is None:
+            return request(timeout)
+
+        primary = self._pool.submit(request, timeout)
+        try:
+            return primary.result(timeout=delay)
+        except FutureTimeout:
+            pass
+
+        backup = self._pool.submit(request, timeout)
+        with self._lock:
+            self.hedges[stage] += 1
+        done, _ = wait([primary, backup], return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+        # the request that finished first failed; the result is whatever the other one does
+        other = backup if primary in done else primary
+        return other.result()
+
+    def call(self, stage: str, request: Callable[[Any], T]) -> T:
+        policy = self.policies.get(stage, StagePolicy())
+        attempt = 0
+        while True:
+            start = time.monotonic()
+            try:
+                if policy.hedge:
+                    result = self._hedged(stage, request, policy.timeout)
+                else:
+                    result = request(policy.timeout)
+            except RETRYABLE_ERRORS:
+                if attempt >= policy.retries:
+                    raise
+                with self._lock:
+                    self.retries[stage] += 1
+                time.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+            with self._lock:
+                self._latencies[stage].append(time.monotonic() - start)
+            return result
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def call_api(api: ApiCaller | None, stage: str, request: Callable[[Any], T]) -> T:
+    """Run ``request`` through ``api``, or once with the client defaults if there is none."""
+    if api is None:
+        return request(NOT_GIVEN)
+    return api.call(stage, request)
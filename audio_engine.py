@@ -0,0 +1,440 @@
+"""Long-lived audio I/O for a session: one input stream, one output stream.
+
+The engine owns a preallocated input ring buffer, filled by the backend's
+input callback, and a jitter buffer drained by its output callback. Captures
+read from the ring through an ``InputReader``, and playback writes PCM16 into
+the jitter buffer, so no stream is opened or torn down per turn. Backends
+only move blocks between the device (or a file, or nothing) and those
+callbacks:
+
+- ``SoundDeviceBackend``: the microphone and speakers, through PortAudio
+- ``WavFileBackend``: microphone input from a WAV file, playback to a WAV file
+- ``ArrayBackend`` / ``NullBackend``: scripted in-memory input or silence,
+  playback discarded, so a whole session runs headless (CI, benchmarks)
+"""
+import abc
+import collections
+import threading
+import time
+from collections.abc import Callable
+
+import numpy as np
+
+# playback is 16-bit mono PCM throughout
+SAMPLE_BYTES = 2
+# a working input delivers a block every few milliseconds; this long without one means it is gone
+INPUT_TIMEOUT_SECONDS = 5.0
+
+InputCallback = Callable[[np.ndarray], None]
+# fills a uint8 view of the device buffer; returns False when there was nothing to play
+OutputCallback = Callable[[np.ndarray], bool]
+
+
+class JitterBuffer:
+    """Byte FIFO between the network reader and the audio callback.
+
+    Playback of an utterance only starts once ``prebuffer_bytes`` have arrived
+    (or the producer has finished), which absorbs uneven chunk arrival. Reads
+    are kept sample-aligned so an underrun never splits a 16-bit sample.
+    """
+
+    def __init__(self, prebuffer_bytes: int):
+        self.prebuffer_bytes = prebuffer_bytes
+        self._lock = threading.Lock()
+        self._chunks: collections.deque[memoryview] = collections.deque()
+        self._offset = 0
+        self._size = 0
+        self._started = False
+        self._closed = True
+        self._drained = threading.Event()
+        self._drained.set()
+        self.started_at: float | None = None
+        self.underruns = 0
+
+    def begin(self) -> None:
+        with self._lock:
+            self._chunks.clear()
+            self._offset = 0
+            self._size = 0
+            self._started = False
+            self._closed = False
+            self.started_at = None
+            self.underruns = 0
+            self._drained.clear()
+
+    def write(self, data: bytes | memoryview) -> None:
+        view = memoryview(data).cast("B")
+        if not view.nbytes:
+            return
+        with self._lock:
+            self._chunks.append(view)
+            self._size += view.nbytes
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            if self._size == 0 and not self._started:
+                self._drained.set()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return self._drained.wait(timeout)
+
+    def read_into(self, out: np.ndarray) -> bool:
+        """Fill ``out`` (a uint8 view of the device buffer), padding with silence.
+
+        Returns False if the buffer was idle and ``out`` is all silence.
+        """
+        with self._lock:
+            if self._drained.is_set():
+                out[:] = 0
+                return False
+            if not self._started:
+                if self._size < self.prebuffer_bytes and not self._closed:
+                    out[:] = 0
+                    return True
+                self._started = True
+                self.started_at = time.perf_counter()
+
+            wanted = min(self._size, len(out))
+            if not self._closed:
+                wanted -= wanted % SAMPLE_BYTES
+            pos = 0
+            while pos < wanted:
+                chunk = self._chunks[0]
+                take = min(len(chunk) - self._offset, wanted - pos)
+                out[pos:pos + take] = np.frombuffer(chunk, dtype=np.uint8, count=take, offset=self._offset)
+                pos += take
+                self._offset += take
+                if self._offset == len(chunk):
+                    self._chunks.popleft()
+                    self._offset = 0
+            self._size -= pos
+
+            if pos < len(out):
+                out[pos:] = 0
+                if self._closed and self._size == 0:
+                    self._drained.set()
+                else:
+                    self.underruns += 1
+            return True
+
+
+class InputReader:
+    """A capture's cursor into the engine's input ring.
+
+    Reading starts at the moment the reader was opened; audio that arrived
+    before (e.g. the assistant's own voice) is never returned. If the reader
+    falls more than a ring's length behind, the oldest audio is skipped and
+    ``read`` reports an overflow, like PortAudio's input overflow flag.
+    """
+
+    def __init__(self, engine: "AudioEngine"):
+        self.engine = engine
+        self.cursor = engine._written
+        # frames a blocked read_into is waiting for; scripted backends feed on demand
+        self.wanted = 0
+
+    def shortfall(self) -> int:
+        return max(0, self.wanted - (self.engine._written - self.cursor))
+
+    def read_into(self, out: np.ndarray, timeout: float | None = INPUT_TIMEOUT_SECONDS) -> tuple[int, bool]:
+        """Copy the next ``len(out)`` frames straight into ``out``; returns (frames, overflowed).
+
+        Blocks until that much input has arrived. Fewer frames are returned
+        only once the input has ended (end of a scripted input, or the engine
+        was closed); after that, ``EOFError`` is raised. ``TimeoutError`` is
+        raised if no input arrives for ``timeout`` seconds, e.g. because the
+        device was unplugged.
+        """
+        engine = self.engine
+        frames = len(out)
+        with engine._input_ready:
+            self.wanted = frames
+            ready = engine._input_ready.wait_for(lambda: engine._written - self.cursor >= frames or engine._ended, timeout)
+            self.wanted = 0
+            if not ready:
+                raise TimeoutError(f"no audio input for {timeout:g}s; is the input device still connected?")
+            if engine._ended and engine._written == self.cursor:
+                raise EOFError("audio input has ended")
+            overflowed = engine._written - self.cursor > engine.ring_frames
+            if overflowed:
+                self.cursor = engine._written - engine.ring_frames
+            frames = min(frames, engine._written - self.cursor)
+            start = self.cursor % engine.ring_frames
+            first = min(frames, engine.ring_frames - start)
+            out[:first] = engine._ring[start:start + first]
+            out[first:frames] = engine._ring[:frames - first]
+            self.cursor += frames
+        return frames, overflowed
+
+    def close(self) -> None:
+        self.engine._close_reader(self)
+
+    def __enter__(self) -> "InputReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class AudioBackend(abc.ABC):
+    """Moves audio between a device and the engine's callbacks.
+
+    ``start`` must begin calling ``on_input`` with float32 mono blocks at
+    ``input_rate`` and ``on_output`` with uint8 views of int16 mono buffers at
+    ``output_rate``, from any thread, until ``stop`` returns.
+    """
+
+    @abc.abstractmethod
+    def start(
+        self,
+        engine: "AudioEngine",
+        on_input: InputCallback,
+        on_output: OutputCallback,
+    ) -> None: ...
+
+    @abc.abstractmethod
+    def stop(self) -> None: ...
+
+
+class SoundDeviceBackend(AudioBackend):
+    """The default input and output devices through sounddevice callbacks."""
+
+    def __init__(self):
+        self._streams = []
+
+    def start(self, engine: "AudioEngine", on_input: InputCallback, on_output: OutputCallback) -> None:
+        # imported here so headless backends work on machines without PortAudio
+        import sounddevice as sd
+
+        def input_callback(indata, frames, time_info, status) -> None:
+            on_input(indata[:, 0])
+
+        def output_callback(outdata, frames, time_info, status) -> None:
+            on_output(outdata.reshape(-1).view(np.uint8))
+
+        self._streams = [
+            sd.InputStream(
+                samplerate=engine.input_rate,
+                channels=1,
+                dtype="float32",
+                blocksize=engine.block_frames(engine.input_rate),
+                callback=input_callback,
+            ),
+            sd.OutputStream(
+                samplerate=engine.output_rate,
+                channels=1,
+                dtype="int16",
+                blocksize=engine.block_frames(engine.output_rate),
+                callback=output_callback,
+            ),
+        ]
+        for stream in self._streams:
+            stream.start()
+
+    def stop(self) -> None:
+        for stream in self._streams:
+            stream.stop()
+            stream.close()
+        self._streams = []
+
+
+class ArrayBackend(AudioBackend):
+    """Scripted microphone input from an array; playback is handed to ``sink``.
+
+    A pump thread drives both callbacks. The script only advances while a
+    capture is listening, as if the user speaks whenever prompted; after it
+    runs out, the engine's input ends (captures raise ``EOFError``). With ``realtime`` the pump keeps device
+    pace, otherwise it runs as fast as the session consumes audio.
+    """
+
+    def __init__(self, samples: np.ndarray | None = None, samplerate: int | None = None, realtime: bool = False):
+        self.samples = samples
+        self.samplerate = samplerate
+        self.realtime = realtime
+        self.played_seconds = 0.0
+        self._running = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def sink(self, pcm: np.ndarray) -> None:
+        """Receive one block of played int16 samples; discarded by default."""
+
+    def start(self, engine: "AudioEngine", on_input: InputCallback, on_output: OutputCallback) -> None:
+        script = np.zeros(0, dtype=np.float32)
+        if self.samples is not None:
+            script = resample(np.asarray(self.samples, dtype=np.float32), self.samplerate or engine.input_rate, engine.input_rate)
+        self._running.set()
+        self._thread = threading.Thread(
+            target=self._pump, args=(engine, script, on_input, on_output), name="audio-pump", daemon=True
+        )
+        self._thread.start()
+
+    def _pump(self, engine: "AudioEngine", script: np.ndarray, on_input: InputCallback, on_output: OutputCallback) -> None:
+        in_frames = engine.block_frames(engine.input_rate)
+        out_frames = engine.block_frames(engine.output_rate)
+        out_block = np.zeros(out_frames, dtype=np.int16)
+        position = 0
+        ended = False
+        tick = engine.block_ms / 1000
+        next_tick = time.perf_counter()
+        while self._running.is_set():
+            demand = engine.input_demand()
+            # the script only advances while someone listens; without realtime, only as fast as they read
+            if demand is not None:
+                blocks = 1 if self.realtime else -(-demand // in_frames)
+                for _ in range(blocks):
+                    if position >= len(script):
+                        break
+                    on_input(script[position:position + in_frames])
+                    position += in_frames
+            if position >= len(script) and not ended:
+                ended = True
+                engine.end_input()
+            if on_output(out_block.view(np.uint8)):
+                self.played_seconds += out_frames / engine.output_rate
+                self.sink(out_block)
+            if self.realtime:
+                next_tick += tick
+                time.sleep(max(0.0, next_tick - time.perf_counter()))
+            else:
+                time.sleep(0.0005)
+
+    def stop(self) -> None:
+        self._running.clear()
+        if self._thread is not None:
+            self._thread.join()
+
+
+class NullBackend(ArrayBackend):
+    """Silent input and discarded output."""
+
+    def __init__(self, realtime: bool = False):
+        super().__init__(realtime=realtime)
+
+
+class WavFileBackend(ArrayBackend):
+    """Read microphone input from one WAV file and record playback into another."""
+
+    def __init__(self, input_path: str | None = None, output_path: str | None = None, realtime: bool = False):
+        import soundfile as sf
+
+        samples, samplerate = None, None
+        if input_path:
+            samples, samplerate = sf.read(input_path, dtype="float32", always_2d=True)
+            samples = samples.mean(axis=1, dtype=np.float32)
+        super().__init__(samples, samplerate, realtime=realtime)
+        self.output_path = output_path
+        self._output = None
+        self._sf = sf
+
+    def start(self, engine: "AudioEngine", on_input: InputCallback, on_output: OutputCallback) -> None:
+        if self.output_path:
+            self._output = self._sf.SoundFile(
+                self.output_path, "w", samplerate=engine.output_rate, channels=1, subtype="PCM_16"
+            )
+        super().start(engine, on_input, on_output)
+
+    def sink(self, pcm: np.ndarray) -> None:
+        if self._output is not None:
+            self._output.write(pcm)
+
+    def stop(self) -> None:
+        super().stop()
+        if self._output is not None:
+            self._output.close()
+            self._output = None
+
+
+def resample(samples: np.ndarray, samplerate: int, target_rate: int) -> np.ndarray:
+    """Linear-interpolation resampling; good enough for speech playback and scripted input."""
+    if samplerate == target_rate or samples.size == 0:
+        return samples
+    n = int(round(len(samples) * target_rate / samplerate))
+    positions = np.arange(n, dtype=np.float64) * (samplerate / target_rate)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(samples.dtype, copy=False)
+
+
+class AudioEngine:
+    """Session-wide duplex audio on top of an ``AudioBackend``.
+
+    ``ring_seconds`` of input are kept in a preallocated float32 ring; at
+    most one capture reads it at a time. Playback goes through a jitter
+    buffer that holds ``prebuffer_ms`` before streamed audio starts.
+    """
+
+    def __init__(
+        self,
+        backend: AudioBackend,
+        input_rate: int = 16000,
+        output_rate: int = 24000,
+        block_ms: int = 20,
+        ring_seconds: float = 10.0,
+        prebuffer_ms: int = 200,
+    ):
+        self.backend = backend
+        self.input_rate = input_rate
+        self.output_rate = output_rate
+        self.block_ms = block_ms
+        self.ring_frames = int(ring_seconds * input_rate)
+        self._ring = np.zeros(self.ring_frames, dtype=np.float32)
+        self._written = 0
+        self._reader: InputReader | None = None
+        self._ended = False
+        self._input_ready = threading.Condition()
+        self.buffer = JitterBuffer(int(output_rate * prebuffer_ms / 1000) * SAMPLE_BYTES)
+        backend.start(self, self._on_input, self.buffer.read_into)
+
+    # stream_speech and play_wav treat the engine as the PCM player
+    @property
+    def samplerate(self) -> int:
+        return self.output_rate
+
+    def block_frames(self, samplerate: int) -> int:
+        return max(1, int(samplerate * self.block_ms / 1000))
+
+    def _on_input(self, block: np.ndarray) -> None:
+        n = len(block)
+        if n > self.ring_frames:
+            block = block[-self.ring_frames:]
+            n = self.ring_frames
+        with self._input_ready:
+            start = self._written % self.ring_frames
+            first = min(n, self.ring_frames - start)
+            self._ring[start:start + first] = block[:first]
+            self._ring[:n - first] = block[first:]
+            self._written += n
+            self._input_ready.notify_all()
+
+    def input_demand(self) -> int | None:
+        """Frames the open capture is blocked waiting for, or None when nobody is listening."""
+        reader = self._reader
+        return reader.shortfall() if reader is not None else None
+
+    def open_input(self) -> InputReader:
+        with self._input_ready:
+            if self._reader is not None:
+                raise RuntimeError("audio input is already being captured")
+            self._reader = InputReader(self)
+            return self._reader
+
+    def _close_reader(self, reader: InputReader) -> None:
+        with self._input_ready:
+            if self._reader is reader:
+                self._reader = None
+
+    def play(self, pcm: np.ndarray | bytes | memoryview) -> None:
+        """Play a complete PCM16 buffer at ``output_rate`` and block until it has been heard."""
+        self.buffer.begin()
+        self.buffer.write(pcm)
+        self.buffer.close()
+        self.buffer.wait()
+
+    def end_input(self) -> None:
+        """Mark the input as exhausted; captures get what is left, then ``EOFError``."""
+        with self._input_ready:
+            self._ended = True
+            self._input_ready.notify_all()
+
+    def close(self) -> None:
+        self.backend.stop()
+        self.end_input()
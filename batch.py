@@ -0,0 +1,147 @@
+import json
+import os
+import threading
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+AUDIO_EXTENSIONS = (".wav", ".flac", ".ogg")
+
+
+class RateLimiter:
+    """Token bucket shared by worker threads; ``per_minute <= 0`` disables it."""
+
+    def __init__(self, per_minute: float, burst: int = 1):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if not self.interval:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) / self.interval)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) * self.interval
+            time.sleep(delay)
+
+
+def find_audio_files(input_dir: str) -> Iterator[str]:
+    """Yield audio files under ``input_dir`` in a stable (sorted) order."""
+    for root, dirs, files in os.walk(input_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(AUDIO_EXTENSIONS):
+                yield os.path.join(root, name)
+
+
+def _manifest_key(input_dir: str, path: str) -> dict:
+    stat = os.stat(path)
+    return {"file": os.path.relpath(path, input_dir), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def load_manifest(path: str) -> set[tuple]:
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # a crash can leave a partial last line; that file is simply redone
+                continue
+            done.add((entry["file"], entry["size"], entry["mtime_ns"]))
+    return done
+
+
+def run_batch(
+    input_dir: str,
+    output_path: str,
+    manifest_path: str,
+    process: Callable[[str], dict],
+    workers: int = 4,
+    per_minute: float = 0.0,
+) -> dict:
+    """Run ``process`` over every audio file in ``input_dir``.
+
+    Each result is appended to ``output_path`` as one JSON line as soon as it
+    finishes, and successfully processed files are then recorded in
+    ``manifest_path`` (keyed by relative path, size and mtime) so a rerun
+    skips them. ``process`` returns a dict that should include an
+    ``audio_seconds`` field; exceptions are written as error records and the
+    file is retried on the next run.
+    """
+    done = load_manifest(manifest_path)
+    pending = []
+    skipped = 0
+    for path in find_audio_files(input_dir):
+        key = _manifest_key(input_dir, path)
+        if (key["file"], key["size"], key["mtime_ns"]) in done:
+            skipped += 1
+        else:
+            pending.append((path, key))
+
+    print(f"Batch: {len(pending)} files to process, {skipped} already done")
+    limiter = RateLimiter(per_minute)
+
+    def run_one(path: str) -> dict:
+        limiter.acquire()
+        return process(path)
+
+    stats = {"processed": 0, "failed": 0, "skipped": skipped, "audio_seconds": 0.0, "elapsed": 0.0}
+    start = time.monotonic()
+    with (
+        open(output_path, "a", encoding="utf-8") as output,
+        open(manifest_path, "a", encoding="utf-8") as manifest,
+        ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="batch") as pool,
+    ):
+        futures = {}
+        queued = iter(pending)
+        # keep only a bounded number of files queued ahead of the workers
+        for path, key in queued:
+            futures[pool.submit(run_one, path)] = key
+            if len(futures) >= 2 * max(1, workers):
+                break
+
+        while futures:
+            finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in finished:
+                key = futures.pop(future)
+                try:
+                    record = {"file": key["file"], **future.result()}
+                except Exception as exc:
+                    record = {"file": key["file"], "error": f"{type(exc).__name__}: {exc}"}
+                output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                output.flush()
+                if "error" in record:
+                    stats["failed"] += 1
+                    print(f"Failed: {key['file']} ({record['error']})")
+                else:
+                    manifest.write(json.dumps(key) + "\n")
+                    manifest.flush()
+                    stats["processed"] += 1
+                    stats["audio_seconds"] += record.get("audio_seconds", 0.0)
+                    print(f"Done: {key['file']}" + (" (no speech, not transcribed)" if record.get("no_speech") else ""))
+
+                next_item = next(queued, None)
+                if next_item is not None:
+                    futures[pool.submit(run_one, next_item[0])] = next_item[1]
+
+    stats["elapsed"] = time.monotonic() - start
+    elapsed = max(stats["elapsed"], 1e-9)
+    stats["files_per_minute"] = stats["processed"] * 60.0 / elapsed
+    stats["audio_seconds_per_second"] = stats["audio_seconds"] / elapsed
+    print(
+        f"Batch finished: {stats['processed']} processed, {stats['failed']} failed, "
+        f"{stats['skipped']} skipped in {stats['elapsed']:.1f}s "
+        f"({stats['files_per_minute']:.1f} files/min, {stats['audio_seconds_per_second']:.1f} audio-s/s)"
+    )
+    return stats
@@ -0,0 +1,124 @@
+"""End-to-end session benchmark: scripted turns through main.main().
+
+Starts the stub OpenAI server, plugs a scripted microphone and a null
+speaker (``audio_engine.ArrayBackend``) into main.py's audio engine, runs a full multi-turn session (greeting,
+N notes, done phrase, closing) and reports how long the user waits after
+each note before they can speak again, plus turns/sec. Any option that is
+not recognised here is passed through to main.py:
+
+    uv run python -m benchmarks.e2e --turns 10
+    uv run python -m benchmarks.e2e --turns 10 --pipeline
+    uv run python -m benchmarks.e2e --turns 10 --stream-tts
+    uv run python -m benchmarks.e2e --turns 10 --overlap --max-p95 1.5
+
+Exits with status 1 when --max-p95 or --min-turns-per-sec is violated.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+import main
+from audio_engine import ArrayBackend
+from benchmarks.stub_server import StubConfig, StubOpenAIServer
+from benchmarks.upload_encoding import synthetic_turn
+
+
+def parse_args() -> tuple[argparse.Namespace, list[str]]:
+    parser = argparse.ArgumentParser(description="Benchmark scripted sessions against a stub OpenAI server.")
+    parser.add_argument("--turns", type=int, default=5, help="Notes dictated before the done phrase")
+    parser.add_argument("--note-seconds", type=float, default=3.0, help="Length of each synthetic note")
+    parser.add_argument("--samplerate", type=int, default=16000)
+    parser.add_argument("--realtime", action="store_true", help="Capture and play audio at real-time speed")
+    parser.add_argument("--stt-latency", type=float, default=StubConfig.stt_latency)
+    parser.add_argument("--summary-latency", type=float, default=StubConfig.summary_latency)
+    parser.add_argument("--tts-first-byte", type=float, default=StubConfig.tts_first_byte)
+    parser.add_argument("--tts-chunk-delay", type=float, default=StubConfig.tts_chunk_delay)
+    parser.add_argument("--max-p95", type=float, default=None, help="Fail if p95 turn latency exceeds this (seconds)")
+    parser.add_argument("--min-turns-per-sec", type=float, default=None, help="Fail if throughput is below this")
+    return parser.parse_known_args()
+
+
+def run(args: argparse.Namespace, main_args: list[str]) -> dict:
+    transcripts = [f"Note {i + 1}: remember to review the quarterly budget." for i in range(args.turns)]
+    config = StubConfig(
+        stt_latency=args.stt_latency,
+        summary_latency=args.summary_latency,
+        tts_first_byte=args.tts_first_byte,
+        tts_chunk_delay=args.tts_chunk_delay,
+        transcripts=transcripts + ["we're all set"],
+    )
+    # speech-like note followed by enough silence for the VAD to end the turn
+    note = np.concatenate(
+        [synthetic_turn(args.samplerate, args.note_seconds, lead=0.2, tail=0.0), np.zeros(2 * args.samplerate, np.float32)]
+    )
+    # a second of quiet room tone for the startup calibration, then the notes,
+    # each at a slightly different level so every upload is distinct
+    room_tone = np.random.default_rng(0).normal(0.0, 0.001, args.samplerate).astype(np.float32)
+    script = np.concatenate([room_tone] + [note * (0.8 + 0.01 * i) for i in range(args.turns + 1)])
+    backend = ArrayBackend(script, args.samplerate, realtime=args.realtime)
+
+    capture_started: list[float] = []
+    capture_finished: list[float] = []
+    capture_turn = main.capture_turn
+    build_audio_backend = main.build_audio_backend
+
+    def timed_capture(*a, **kw):
+        capture_started.append(time.perf_counter())
+        try:
+            return capture_turn(*a, **kw)
+        finally:
+            capture_finished.append(time.perf_counter())
+
+    with StubOpenAIServer(config) as server:
+        os.environ["OPENAI_API_KEY"] = "stub"
+        sys.argv = ["main.py", "--api-base-url", server.base_url, "--samplerate", str(args.samplerate), *main_args]
+        # patched for this run only, so main is unmodified afterwards even if the session fails
+        main.build_audio_backend = lambda _args: backend
+        main.capture_turn = timed_capture
+        start = time.perf_counter()
+        try:
+            main.main()
+        finally:
+            main.capture_turn = capture_turn
+            main.build_audio_backend = build_audio_backend
+        end = time.perf_counter()
+
+    # wait after note k = until capture k+1 starts (or the session ends after the last note)
+    starts = capture_started[1:] + [end]
+    waits = np.array([s - f for s, f in zip(starts, capture_finished)])
+    turns = len(capture_finished)
+    return {
+        "turns": turns,
+        "elapsed": end - start,
+        "turns_per_sec": turns / (end - start),
+        "p50": float(np.quantile(waits, 0.5)),
+        "p95": float(np.quantile(waits, 0.95)),
+        "p99": float(np.quantile(waits, 0.99)),
+        "requests": dict(server.requests),
+    }
+
+
+def main_cli() -> None:
+    args, main_args = parse_args()
+    result = run(args, main_args)
+    print()
+    print(f"Session: {result['turns']} turns in {result['elapsed']:.2f}s ({result['turns_per_sec']:.2f} turns/s)")
+    print(f"Turn latency: p50 {result['p50']:.3f}s  p95 {result['p95']:.3f}s  p99 {result['p99']:.3f}s")
+    print(f"Stub requests: {result['requests']}")
+
+    failures = []
+    if args.max_p95 is not None and result["p95"] > args.max_p95:
+        failures.append(f"p95 turn latency {result['p95']:.3f}s > {args.max_p95}s")
+    if args.min_turns_per_sec is not None and result["turns_per_sec"] < args.min_turns_per_sec:
+        failures.append(f"throughput {result['turns_per_sec']:.2f} turns/s < {args.min_turns_per_sec}")
+    if failures:
+        print("FAIL: " + "; ".join(failures))
+        raise SystemExit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,89 @@
+"""Startup and first-call latency benchmark for main.py.
+
+Measures, in fresh interpreters, how long ``main.py --help`` takes against a
+full ``import main`` (numpy, sounddevice, soundfile, openai, dotenv), then the
+latency of the first transcription on a new client with and without the
+connection pre-warm main.py runs during the greeting:
+
+    uv run python -m benchmarks.startup
+    uv run python -m benchmarks.startup --base-url https://api.openai.com/v1
+
+Without ``--base-url`` the first-call numbers come from the local stub
+server, which has no TLS, so they show only client and TCP setup; against
+the real API they include DNS and the TLS handshake (needs OPENAI_API_KEY).
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+import main
+from api_client import build_client, warm_connection
+from benchmarks.stub_server import StubConfig, StubOpenAIServer
+from benchmarks.upload_encoding import synthetic_turn
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark main.py startup and first-call latency.")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement; the median is reported")
+    parser.add_argument("--base-url", default=None, help="Measure first calls against this API instead of the stub")
+    parser.add_argument("--stt-model", default="gpt-4o-mini-transcribe")
+    return parser.parse_args()
+
+
+def time_command(command: list[str], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def first_call(base_url: str, api_key: str, model: str, prewarm: bool) -> tuple[float, float | None]:
+    """Return (first transcription seconds, pre-warm seconds) on a brand-new client."""
+    client = build_client(api_key, base_url=base_url)
+    warm_seconds = warm_connection(client) if prewarm else None
+    audio = main.encode_audio(synthetic_turn(16000, seconds=1.0, lead=0.1, tail=0.0), 16000, fmt="flac")
+    start = time.perf_counter()
+    main.transcribe_audio(client, audio, model)
+    elapsed = time.perf_counter() - start
+    client.close()
+    return elapsed, warm_seconds
+
+
+def report_first_calls(base_url: str, api_key: str, args: argparse.Namespace) -> None:
+    for prewarm in (False, True):
+        results = [first_call(base_url, api_key, args.stt_model, prewarm) for _ in range(args.repeat)]
+        label = "pre-warmed" if prewarm else "cold"
+        line = f"first STT call ({label}): {np.median([r[0] for r in results]) * 1000:8.1f} ms"
+        if prewarm:
+            warm = [r[1] for r in results if r[1] is not None]
+            line += f"   (warm-up itself {np.median(warm) * 1000:.1f} ms)" if warm else "   (warm-up failed)"
+        print(line)
+
+
+def main_cli() -> None:
+    args = parse_args()
+    help_seconds = time_command([sys.executable, "main.py", "--help"], args.repeat)
+    import_seconds = time_command([sys.executable, "-c", "import main"], args.repeat)
+    print(f"main.py --help:   {help_seconds * 1000:8.1f} ms")
+    print(f"import main:      {import_seconds * 1000:8.1f} ms")
+
+    if args.base_url:
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise SystemExit("OPENAI_API_KEY is not set")
+        report_first_calls(args.base_url, api_key, args)
+    else:
+        with StubOpenAIServer(StubConfig(stt_latency=0.0)) as server:
+            report_first_calls(server.base_url, "stub", args)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,242 @@
+"""Local stand-in for the OpenAI endpoints main.py uses.
+
+Implements ``/v1/models``, ``/v1/audio/transcriptions``, ``/v1/responses`` (plain and
+streamed) and ``/v1/audio/speech`` (wav and pcm, streamed in chunks) with
+configurable latency and payload sizes, so sessions can be benchmarked
+without network access or API keys. Run standalone with:
+
+    uv run python -m benchmarks.stub_server --port 8765
+
+and point main.py at it with ``--api-base-url http://127.0.0.1:8765/v1``.
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import math
+import struct
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SPEECH_SAMPLERATE = 24000
+
+
+@dataclass
+class StubConfig:
+    stt_latency: float = 0.3
+    summary_latency: float = 0.5
+    summary_token_delay: float = 0.02
+    tts_first_byte: float = 0.2
+    tts_chunk_delay: float = 0.01
+    tts_chunk_bytes: int = 4800
+    # synthesized audio length per character of input text
+    tts_seconds_per_char: float = 0.06
+    summary_text: str = (
+        "- Review the quarterly budget before Friday.\n"
+        "- Send the updated plan to the team.\n"
+        "- Book a follow-up meeting next week."
+    )
+    # transcripts handed out in order to each distinct upload; the last one repeats once exhausted.
+    # Done-phrase probes (uploads named probe.*) get the next one without using it up.
+    transcripts: list[str] = field(default_factory=lambda: ["Remember to review the quarterly budget.", "we're all set"])
+
+
+def _pcm_tone(seconds: float) -> bytes:
+    frames = int(seconds * SPEECH_SAMPLERATE)
+    period = SPEECH_SAMPLERATE // 200
+    cycle = b"".join(struct.pack("<h", int(3000 * math.sin(2 * math.pi * i / period))) for i in range(period))
+    return (cycle * (frames // period + 1))[: frames * 2]
+
+
+def _wav_header(nbytes: int) -> bytes:
+    return b"RIFF" + struct.pack("<I", 36 + nbytes) + b"WAVE" + b"fmt " + struct.pack(
+        "<IHHIIHH", 16, 1, 1, SPEECH_SAMPLERATE, SPEECH_SAMPLERATE * 2, 2, 16
+    ) + b"data" + struct.pack("<I", nbytes)
+
+
+class StubOpenAIServer:
+    """Threaded HTTP server; use as a context manager or call start()/stop()."""
+
+    def __init__(self, config: StubConfig | None = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or StubConfig()
+        self.requests: dict[str, int] = {"models": 0, "stt": 0, "stt_probe": 0, "summary": 0, "tts": 0}
+        self._transcripts = itertools.chain(self.config.transcripts, itertools.repeat(self.config.transcripts[-1]))
+        self._next_transcript: str | None = None
+        self._assigned: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def transcript_for(self, upload_digest: str, probe: bool = False) -> str:
+        # retried or hedged duplicates of the same upload get the same transcript
+        with self._lock:
+            if self._next_transcript is None:
+                self._next_transcript = next(self._transcripts)
+            if probe:
+                # a probe hears the end of the turn being recorded, which is the next transcript
+                self.requests["stt_probe"] += 1
+                return self._next_transcript
+            self.requests["stt"] += 1
+            if upload_digest not in self._assigned:
+                self._assigned[upload_digest] = self._next_transcript
+                self._next_transcript = None
+            return self._assigned[upload_digest]
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            self.requests[name] += 1
+
+    def start(self) -> "StubOpenAIServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="stub-openai", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "StubOpenAIServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # headers and body are separate writes; don't let Nagle delay the body on kept-alive connections
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def _send_json(self, payload: dict) -> None:
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _start_chunked(self, content_type: str) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+            def _write_chunk(self, data: bytes) -> None:
+                self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+            def do_GET(self) -> None:
+                # the client's connection pre-warm lists models
+                if self.path.endswith("/models"):
+                    server.count("models")
+                    self._send_json({"object": "list", "data": [{"id": "stub", "object": "model", "created": 0, "owned_by": "stub"}]})
+                else:
+                    self.send_error(404)
+
+            def do_POST(self) -> None:
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                config = server.config
+                if self.path.endswith("/audio/transcriptions"):
+                    time.sleep(config.stt_latency)
+                    # the multipart boundary is random per request, so leave it out of the digest
+                    boundary = self.headers.get("Content-Type", "").partition("boundary=")[2].encode("ascii")
+                    digest = hashlib.sha256(body.replace(boundary, b"") if boundary else body).hexdigest()
+                    probe = b'filename="probe.' in body
+                    self._send_json({"text": server.transcript_for(digest, probe=probe)})
+                elif self.path.endswith("/responses"):
+                    server.count("summary")
+                    self._responses(json.loads(body or b"{}"))
+                elif self.path.endswith("/audio/speech"):
+                    server.count("tts")
+                    self._speech(json.loads(body or b"{}"))
+                else:
+                    self.send_error(404)
+
+            def _responses(self, request: dict) -> None:
+                config = server.config
+                time.sleep(config.summary_latency)
+                text = config.summary_text
+                if not request.get("stream"):
+                    self._send_json(
+                        {
+                            "id": "resp_stub",
+                            "object": "response",
+                            "created_at": int(time.time()),
+                            "model": request.get("model", "stub"),
+                            "status": "completed",
+                            "output": [
+                                {
+                                    "type": "message",
+                                    "id": "msg_stub",
+                                    "role": "assistant",
+                                    "status": "completed",
+                                    "content": [{"type": "output_text", "text": text, "annotations": []}],
+                                }
+                            ],
+                        }
+                    )
+                    return
+
+                self._start_chunked("text/event-stream")
+                for sequence, word in enumerate(text.split(" ")):
+                    delta = word if sequence == 0 else " " + word
+                    event = {
+                        "type": "response.output_text.delta",
+                        "delta": delta,
+                        "item_id": "msg_stub",
+                        "output_index": 0,
+                        "content_index": 0,
+                        "sequence_number": sequence,
+                    }
+                    self._write_chunk(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+                    time.sleep(config.summary_token_delay)
+                self._write_chunk(b"data: [DONE]\n\n")
+                self._write_chunk(b"")
+
+            def _speech(self, request: dict) -> None:
+                config = server.config
+                time.sleep(config.tts_first_byte)
+                pcm = _pcm_tone(len(request.get("input", "")) * config.tts_seconds_per_char)
+                payload = pcm if request.get("response_format") == "pcm" else _wav_header(len(pcm)) + pcm
+                content_type = "audio/pcm" if request.get("response_format") == "pcm" else "audio/wav"
+                self._start_chunked(content_type)
+                for offset in range(0, len(payload), config.tts_chunk_bytes):
+                    self._write_chunk(payload[offset:offset + config.tts_chunk_bytes])
+                    time.sleep(config.tts_chunk_delay)
+                self._write_chunk(b"")
+
+        return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the stub OpenAI server.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--stt-latency", type=float, default=StubConfig.stt_latency)
+    parser.add_argument("--summary-latency", type=float, default=StubConfig.summary_latency)
+    parser.add_argument("--tts-first-byte", type=float, default=StubConfig.tts_first_byte)
+    args = parser.parse_args()
+
+    config = StubConfig(stt_latency=args.stt_latency, summary_latency=args.summary_latency, tts_first_byte=args.tts_first_byte)
+    server = StubOpenAIServer(config, port=args.port)
+    print(f"Stub OpenAI server listening on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Compare STT upload encodings: bytes sent and encode cost per turn.
+
+Run from the project root:
+
+    uv run python -m benchmarks.upload_encoding
+    uv run python -m benchmarks.upload_encoding --input notes.wav --repeat 20
+
+Without --input a synthetic 10 second turn (speech-like tones framed by
+silence) is used, so the benchmark needs no microphone or network.
+"""
+import argparse
+import time
+
+import numpy as np
+import soundfile as sf
+
+from main import UPLOAD_FORMATS, downsample, encode_audio, trim_silence
+
+
+def synthetic_turn(samplerate: int, seconds: float = 10.0, lead: float = 1.5, tail: float = 2.0) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * samplerate)) / samplerate
+    # harmonic stack around a wandering pitch, amplitude-modulated at a syllable rate
+    pitch = 140 + 30 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / samplerate
+    voice = sum(np.sin(k * phase) / k for k in range(1, 6))
+    envelope = 0.5 * (1 + np.sin(2 * np.pi * 4 * t)) ** 2
+    signal = 0.2 * voice * envelope + 0.002 * rng.standard_normal(t.size)
+    lead_frames, tail_frames = int(lead * samplerate), int(tail * samplerate)
+    signal[:lead_frames] = 0.002 * rng.standard_normal(lead_frames)
+    if tail_frames:
+        signal[-tail_frames:] = 0.002 * rng.standard_normal(tail_frames)
+    return signal.astype(np.float32)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark STT upload encodings.")
+    parser.add_argument("--input", help="WAV file to use as the recorded turn")
+    parser.add_argument("--samplerate", type=int, default=48000, help="Capture rate for the synthetic turn")
+    parser.add_argument("--upload-rate", type=int, default=16000, help="Target upload rate (0 keeps capture rate)")
+    parser.add_argument("--repeat", type=int, default=10, help="Encodes per option; the median is reported")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.input:
+        samples, samplerate = sf.read(args.input, dtype="float32", always_2d=True)
+        samples = samples.mean(axis=1)
+    else:
+        samplerate = args.samplerate
+        samples = synthetic_turn(samplerate)
+
+    print(f"Turn: {len(samples) / samplerate:.2f}s at {samplerate} Hz")
+    print(f"{'format':<8} {'trim':<5} {'rate':>6} {'seconds':>8} {'bytes':>10} {'ratio':>7} {'encode ms':>10}")
+
+    # what main.py used to upload: float32 WAV at the capture rate, untrimmed
+    baseline = encode_audio(samples, samplerate, fmt="wav").getbuffer().nbytes
+    print(f"{'original':<8} {'no':<5} {samplerate:>6} {len(samples) / samplerate:>8.2f} {baseline:>10} {1.0:>6.1f}x")
+
+    for fmt in UPLOAD_FORMATS:
+        for trim in (False, True):
+            timings = []
+            size = 0
+            duration = 0.0
+            try:
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    upload, rate = downsample(samples, samplerate, args.upload_rate)
+                    if trim:
+                        upload = trim_silence(upload, rate)
+                    buffer = encode_audio(upload, rate, fmt=fmt)
+                    timings.append(time.perf_counter() - start)
+                    size = buffer.getbuffer().nbytes
+                    duration = len(upload) / rate
+            except RuntimeError as exc:
+                # e.g. libsndfile built without Opus support
+                print(f"{fmt:<8} {'yes' if trim else 'no':<5} unavailable: {exc}")
+                continue
+            print(
+                f"{fmt:<8} {'yes' if trim else 'no':<5} {rate:>6} {duration:>8.2f} {size:>10} "
+                f"{baseline / size:>6.1f}x {np.median(timings) * 1000:>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import difflib
+import re
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+def split_at_quiet_points(
+    samples: np.ndarray,
+    samplerate: int,
+    chunk_seconds: float = 60.0,
+    overlap_seconds: float = 1.0,
+    search_seconds: float = 5.0,
+) -> list[tuple[int, int]]:
+    """Return (start, end) sample ranges of roughly ``chunk_seconds`` each.
+
+    Each cut is moved to the quietest 20 ms frame within ``search_seconds`` of
+    the nominal boundary so words are not split, and every segment after the
+    first starts ``overlap_seconds`` early so a word near the cut is heard by
+    both neighbours; the duplicate is removed when stitching.
+    """
+    total = len(samples)
+    chunk = int(chunk_seconds * samplerate)
+    if chunk <= 0 or total <= chunk:
+        return [(0, total)]
+
+    frame = max(1, int(samplerate * 0.02))
+    usable = total - total % frame
+    energy = np.square(samples[:usable], dtype=np.float32).reshape(-1, frame).mean(axis=1)
+    search = int(search_seconds * samplerate) // frame
+    overlap = int(overlap_seconds * samplerate)
+
+    cuts = [0]
+    while total - cuts[-1] > chunk + chunk // 2:
+        nominal = (cuts[-1] + chunk) // frame
+        lo = max(cuts[-1] // frame + 1, nominal - search)
+        hi = min(len(energy), nominal + search + 1)
+        if lo >= hi:
+            cuts.append(nominal * frame)
+            continue
+        quietest = lo + int(np.argmin(energy[lo:hi]))
+        cuts.append(quietest * frame + frame // 2)
+    cuts.append(total)
+
+    return [(max(0, start - overlap) if i else start, end) for i, (start, end) in enumerate(zip(cuts, cuts[1:]))]
+
+
+def _normalize(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def stitch_transcripts(parts: list[str], window_words: int = 12) -> str:
+    """Join segment transcripts, dropping words repeated across an overlap.
+
+    The tail of the text so far is aligned with the head of the next part;
+    if they share a run of at least two words near the seam, everything up to
+    the end of that run is taken from the earlier part only.
+    """
+    words: list[str] = []
+    for part in parts:
+        new = part.split()
+        if words and new:
+            tail = [_normalize(w) for w in words[-window_words:]]
+            head = [_normalize(w) for w in new[:window_words]]
+            match = difflib.SequenceMatcher(None, tail, head, autojunk=False).find_longest_match(
+                0, len(tail), 0, len(head)
+            )
+            if match.size >= 2:
+                # anything after the match in the earlier part is a clipped word at the cut
+                del words[len(words) - len(tail) + match.a + match.size:]
+                new = new[match.b + match.size:]
+        words.extend(new)
+    return " ".join(words)
+
+
+def transcribe_chunked(
+    samples: np.ndarray,
+    samplerate: int,
+    transcribe: Callable[[np.ndarray], str],
+    chunk_seconds: float = 60.0,
+    overlap_seconds: float = 1.0,
+    max_workers: int = 4,
+) -> str:
+    """Transcribe a long recording as overlapping segments on a bounded thread pool."""
+    segments = split_at_quiet_points(samples, samplerate, chunk_seconds, overlap_seconds)
+    if len(segments) == 1:
+        return transcribe(samples)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="stt-chunk") as pool:
+        parts = list(pool.map(lambda seg: transcribe(samples[seg[0]:seg[1]]), segments))
+    return stitch_transcripts([part for part in parts if part])
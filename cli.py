@@ -0,0 +1,333 @@
+"""Command line for main.py.
+
+Kept free of numpy, sounddevice, soundfile, openai and dotenv so ``--help``
+and usage errors return before main.py loads any of them.
+"""
+import argparse
+
+from instructions import voice_notes_instruction as instruction_module
+SUMMARY_INSTRUCTION = instruction_module.SUMMARY_INSTRUCTION
+SESSION_SUMMARY_INSTRUCTION = instruction_module.SESSION_SUMMARY_INSTRUCTION
+GREETING_TEXT = instruction_module.GREETING_TEXT
+FOLLOWUP_PROMPT = instruction_module.FOLLOWUP_PROMPT
+CLOSING_TEXT = instruction_module.CLOSING_TEXT
+DONE_PHRASES = instruction_module.DONE_PHRASES
+
+# --upload-format name -> (soundfile container, subtype, file suffix)
+UPLOAD_FORMATS = {
+    "wav": ("WAV", "FLOAT", ".wav"),
+    "pcm16": ("WAV", "PCM_16", ".wav"),
+    "flac": ("FLAC", "PCM_16", ".flac"),
+    "ogg": ("OGG", "VORBIS", ".ogg"),
+    "opus": ("OGG", "OPUS", ".ogg"),
+}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Record voice notes, summarize, and play TTS.")
+    parser.add_argument(
+        "command",
+        nargs="?",
+        choices=("run", "warm-cache", "batch"),
+        default="run",
+        help=(
+            "run a live session (default), pre-render the fixed prompts into --tts-cache-dir, "
+            "or transcribe and summarize the recordings in --input-dir"
+        ),
+    )
+    parser.add_argument(
+        "--capture",
+        choices=("vad", "fixed"),
+        default=None,
+        help="End each recording on trailing silence (vad, the default) or after --seconds (fixed)",
+    )
+    parser.add_argument(
+        "--seconds",
+        type=int,
+        default=None,
+        help="Recording duration in seconds for --capture fixed (default 10); implies --capture fixed",
+    )
+    parser.add_argument(
+        "--silence-seconds",
+        type=float,
+        default=1.0,
+        help="Trailing silence that ends a recording in vad capture mode",
+    )
+    parser.add_argument(
+        "--max-seconds",
+        type=float,
+        default=120.0,
+        help="Hard limit on a single recording in vad capture mode",
+    )
+    parser.add_argument(
+        "--vad-threshold",
+        type=float,
+        default=None,
+        help="Energy threshold in dBFS above which a block counts as speech (default: calibrated, else -45)",
+    )
+    parser.add_argument(
+        "--calibrate",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Measure one second of room noise when a session starts and set --vad-threshold from it",
+    )
+    parser.add_argument(
+        "--min-speech-seconds",
+        type=float,
+        default=0.25,
+        help="Recordings with less speech than this are treated as silence and never uploaded",
+    )
+    parser.add_argument(
+        "--normalize",
+        action="store_true",
+        help="Boost quiet speech to a consistent level before upload",
+    )
+    parser.add_argument("--samplerate", type=int, default=16000, help="Recording sample rate")
+    parser.add_argument(
+        "--audio-backend",
+        choices=("sounddevice", "wav", "null"),
+        default="sounddevice",
+        help="Audio I/O: the microphone and speakers, WAV files (--input-wav/--output-wav), or silence",
+    )
+    parser.add_argument("--input-wav", metavar="FILE", default=None, help="Microphone input for --audio-backend wav")
+    parser.add_argument("--output-wav", metavar="FILE", default=None, help="Record playback here with --audio-backend wav")
+    parser.add_argument(
+        "--realtime",
+        action="store_true",
+        help="Run the wav/null audio backends at device speed instead of as fast as possible",
+    )
+    parser.add_argument(
+        "--upload-format",
+        choices=tuple(UPLOAD_FORMATS),
+        default="flac",
+        help="Encoding used when uploading recordings for transcription",
+    )
+    parser.add_argument(
+        "--upload-rate",
+        type=int,
+        default=16000,
+        help="Downsample recordings to this rate before upload (0 keeps the capture rate)",
+    )
+    parser.add_argument(
+        "--no-trim",
+        dest="trim",
+        action="store_false",
+        help="Upload recordings without trimming leading/trailing silence",
+    )
+    parser.add_argument(
+        "--chunk-seconds",
+        type=float,
+        default=60.0,
+        help="Split recordings longer than this into overlapping segments transcribed in parallel (0 disables)",
+    )
+    parser.add_argument(
+        "--stt-workers",
+        type=int,
+        default=4,
+        help="Maximum concurrent transcription requests for a chunked recording",
+    )
+    parser.add_argument("--stt-model", default="gpt-4o-mini-transcribe", help="OpenAI STT model")
+    parser.add_argument("--summary-model", default="gpt-4o-mini", help="OpenAI model for summary")
+    parser.add_argument("--tts-model", default="gpt-4o-mini-tts", help="OpenAI TTS model")
+    parser.add_argument("--voice", default="alloy", help="TTS voice")
+    parser.add_argument(
+        "--instruction",
+        default=SUMMARY_INSTRUCTION,
+        help="System instruction for the summary step",
+    )
+    parser.add_argument(
+        "--session-summary",
+        action="store_true",
+        help="Keep one running summary for the whole session, updated with each note, and save it at close",
+    )
+    parser.add_argument(
+        "--session-instruction",
+        default=SESSION_SUMMARY_INSTRUCTION,
+        help="System instruction for updating the running summary with --session-summary",
+    )
+    parser.add_argument(
+        "--notes-dir",
+        default="notes",
+        help="Directory the --session-summary notes are written to at close",
+    )
+    parser.add_argument(
+        "--greeting",
+        default=GREETING_TEXT,
+        help="Greeting text spoken before recording",
+    )
+    parser.add_argument(
+        "--followup",
+        default=FOLLOWUP_PROMPT,
+        help="Prompt spoken after each summary",
+    )
+    parser.add_argument(
+        "--closing",
+        default=CLOSING_TEXT,
+        help="Closing text spoken when the session ends",
+    )
+    parser.add_argument(
+        "--overlap",
+        action="store_true",
+        help="Start recording the next note while the previous one is transcribed and summarized",
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Stream the summary and synthesize/play it sentence by sentence while it is generated",
+    )
+    parser.add_argument(
+        "--tts-in-flight",
+        type=int,
+        default=3,
+        help="Maximum concurrent sentence TTS requests with --pipeline",
+    )
+    parser.add_argument(
+        "--stream-tts",
+        action="store_true",
+        help="Stream summary speech as PCM and start playback while it is still being synthesized (not with --pipeline)",
+    )
+    parser.add_argument(
+        "--jitter-ms",
+        type=int,
+        default=200,
+        help="Audio buffered before streamed playback starts (with --stream-tts)",
+    )
+    parser.add_argument(
+        "--api-base-url",
+        default=None,
+        help="Alternative OpenAI-compatible endpoint (e.g. a local stub server)",
+    )
+    parser.add_argument("--stt-timeout", type=float, default=30.0, help="Timeout in seconds for each STT request")
+    parser.add_argument("--summary-timeout", type=float, default=30.0, help="Timeout in seconds for each summary request")
+    parser.add_argument("--tts-timeout", type=float, default=30.0, help="Timeout in seconds for each TTS request")
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=2,
+        help="Retries with jittered exponential backoff for failed or timed-out API calls",
+    )
+    parser.add_argument(
+        "--no-prewarm",
+        dest="prewarm",
+        action="store_false",
+        help="Do not open the API connection in the background while the greeting plays",
+    )
+    parser.add_argument(
+        "--hedge",
+        action="store_true",
+        help="Send a duplicate STT/TTS request when the first is slower than the recent p95",
+    )
+    parser.add_argument(
+        "--hedge-after",
+        type=float,
+        default=None,
+        help="Fixed delay in seconds before sending a hedged duplicate (default: observed p95)",
+    )
+    parser.add_argument(
+        "--tts-cache-dir",
+        metavar="DIR",
+        default=None,
+        help="Cache synthesized greeting/follow-up/closing audio in DIR across sessions",
+    )
+    parser.add_argument(
+        "--tts-cache-max-mb",
+        type=float,
+        default=64.0,
+        help="Size limit for --tts-cache-dir; least recently used entries are evicted",
+    )
+    parser.add_argument(
+        "--summary-cache",
+        metavar="PATH",
+        default=None,
+        help="Reuse summaries of identical (model, instruction, transcript) inputs from the SQLite database at PATH",
+    )
+    parser.add_argument(
+        "--summary-cache-ttl-hours",
+        type=float,
+        default=0.0,
+        help="Expire --summary-cache entries after this many hours (0 keeps them until evicted)",
+    )
+    parser.add_argument(
+        "--summary-cache-max-entries",
+        type=int,
+        default=10000,
+        help="Size limit for --summary-cache; least recently used entries are evicted",
+    )
+    parser.add_argument(
+        "--keep-audio",
+        metavar="DIR",
+        default=None,
+        help="Also write recordings and TTS audio as WAV files into DIR",
+    )
+    parser.add_argument("--input-dir", help="Directory of recordings (.wav/.flac/.ogg) for the batch command")
+    parser.add_argument(
+        "--output",
+        default="batch_results.jsonl",
+        help="JSONL file the batch command appends one result per recording to",
+    )
+    parser.add_argument(
+        "--manifest",
+        default=None,
+        help="Record of finished recordings used to resume a batch (default: OUTPUT.manifest)",
+    )
+    parser.add_argument("--batch-workers", type=int, default=4, help="Recordings processed concurrently in batch mode")
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=0.0,
+        help="Maximum recordings started per minute in batch mode (0 means unlimited)",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="FILE",
+        default=None,
+        help="Write per-stage latency percentiles, bytes and audio-seconds as JSON to FILE at exit",
+    )
+    parser.add_argument(
+        "--profile-prometheus",
+        metavar="FILE",
+        default=None,
+        help="Also write the stage metrics in Prometheus text format to FILE at exit",
+    )
+    parser.add_argument(
+        "--done-phrases",
+        default=", ".join(DONE_PHRASES),
+        help="Comma-separated phrases that end the session",
+    )
+    parser.add_argument(
+        "--done-probe",
+        action="store_true",
+        help="With --capture vad, transcribe the end of the speech at each pause and end the session as soon as a done phrase is heard",
+    )
+    parser.add_argument(
+        "--done-probe-max-seconds",
+        type=float,
+        default=3.0,
+        help="Seconds of trailing speech the done-phrase probe transcribes",
+    )
+    parser.add_argument(
+        "--pause-seconds",
+        type=float,
+        default=0.35,
+        help="Quiet gap (seconds) that triggers a done-phrase probe",
+    )
+    args = parser.parse_args()
+    if args.capture is None:
+        args.capture = "fixed" if args.seconds is not None else "vad"
+    elif args.capture == "vad" and args.seconds is not None:
+        parser.error("--seconds only applies to --capture fixed; use --max-seconds to cap vad recordings")
+    if args.seconds is None:
+        args.seconds = 10
+    if args.vad_threshold is None:
+        args.vad_threshold = -45.0
+    else:
+        # a threshold given on the command line is kept as is
+        args.calibrate = False
+    if args.pipeline and args.stream_tts:
+        # the pipeline synthesizes sentences concurrently as whole clips; streaming one
+        # response at a time through the jitter buffer would undo that
+        parser.error("--pipeline and --stream-tts are alternative ways to speak the summary; choose one")
+    if args.command == "batch" and args.session_summary:
+        # recordings in a batch are unrelated, and workers would race on one running summary
+        parser.error("--session-summary cannot be used with the batch command")
+    return args
@@ -0,0 +1,109 @@
+import re
+import threading
+from collections.abc import Callable
+
+import numpy as np
+
+
+class DonePhraseMatcher:
+    """Word-boundary matcher for the session's done phrases, compiled once.
+
+    Unlike a substring check, "done" does not match "abandoned". Phrases are
+    matched case-insensitively, with any run of whitespace between words and
+    typographic apostrophes treated like plain ones.
+    """
+
+    def __init__(self, phrases: list[str]):
+        words = [phrase.strip().lower().replace("’", "'").split() for phrase in phrases]
+        words = [w for w in words if w]
+        # longest first so "all set and done" wins over "all set" in the alternation
+        alternatives = sorted((r"\s+".join(map(re.escape, w)) for w in words), key=len, reverse=True)
+        self.phrases = [" ".join(w) for w in words]
+        if alternatives:
+            body = "|".join(alternatives)
+            self._anywhere = re.compile(rf"(?<!\w)(?:{body})(?!\w)")
+            self._at_end = re.compile(rf"(?<!\w)(?:{body})(?!\w)[\W_]*$")
+        else:
+            self._anywhere = self._at_end = None
+
+    @classmethod
+    def from_csv(cls, value: str) -> "DonePhraseMatcher":
+        return cls([phrase for phrase in value.split(",") if phrase.strip()])
+
+    def __bool__(self) -> bool:
+        return self._anywhere is not None
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return text.lower().replace("’", "'")
+
+    def search(self, transcript: str) -> bool:
+        """True if a done phrase appears anywhere in the transcript."""
+        return self._anywhere is not None and self._anywhere.search(self._normalize(transcript)) is not None
+
+    def ends_with(self, transcript: str) -> bool:
+        """True if the transcript ends with a done phrase (trailing punctuation ignored)."""
+        return self._at_end is not None and self._at_end.search(self._normalize(transcript)) is not None
+
+
+class DoneProbe:
+    """Look for a done phrase while the user is still being recorded.
+
+    The recorder calls ``on_pause`` with the speech captured so far whenever
+    the speaker pauses briefly. The last ``max_seconds`` of it, which is where
+    a done phrase would be, are sent to ``transcribe`` on a background thread,
+    so long notes are probed as cheaply as short ones. If that partial
+    transcript ends with a done phrase and the speaker has not resumed since,
+    the probe is confirmed and ``stop_event`` is set so the capture ends
+    without waiting for the full trailing silence. Speech resuming (``on_resume``) or the capture ending
+    (``cancel``) invalidates a probe that is still in flight; the turn's
+    normal transcription then decides.
+    """
+
+    def __init__(
+        self,
+        transcribe: Callable[[np.ndarray], str],
+        matcher: DonePhraseMatcher,
+        stop_event: threading.Event,
+        samplerate: int,
+        max_seconds: float = 3.0,
+    ):
+        self.transcribe = transcribe
+        self.matcher = matcher
+        self.stop_event = stop_event
+        self.samplerate = samplerate
+        self.max_seconds = max_seconds
+        self.confirmed = False
+        self.transcript = ""
+        self._generation = 0
+        self._busy = False
+        self._lock = threading.Lock()
+
+    def on_pause(self, speech: np.ndarray) -> None:
+        speech = speech[-int(self.max_seconds * self.samplerate):]
+        with self._lock:
+            if self._busy or self.confirmed:
+                return
+            self._busy = True
+            generation = self._generation
+        threading.Thread(target=self._probe, args=(speech.copy(), generation), name="done-probe", daemon=True).start()
+
+    def cancel(self) -> None:
+        with self._lock:
+            self._generation += 1
+
+    on_resume = cancel
+
+    def _probe(self, speech: np.ndarray, generation: int) -> None:
+        try:
+            text = self.transcribe(speech)
+        except Exception:
+            # a failed probe is harmless: the normal end-of-turn transcription still runs
+            text = ""
+        with self._lock:
+            self._busy = False
+            if generation != self._generation or not self.matcher.ends_with(text):
+                return
+            self.confirmed = True
+            self.transcript = text
+        self.stop_event.set()
@@ -0,0 +1,51 @@
+"""Advisory whole-file locks shared by the notes journal, indexes and archive.
+
+POSIX uses ``fcntl.flock``. Windows has no flock, so ``msvcrt.locking`` locks
+one byte far past the end of the file instead: the lock never covers data
+anyone reads or writes, and is released when the handle is closed. Windows
+locks are always exclusive, so a shared request takes an exclusive lock there.
+"""
+import errno
+import os
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+# the byte msvcrt locks; no journal, index or archive gets anywhere near this size
+_WINDOWS_LOCK_OFFSET = 0x7FFFFFFF
+
+
+def lock(fd: int, exclusive: bool = True, blocking: bool = True) -> None:
+    """Lock the open file ``fd``; without ``blocking``, raise OSError if another holder has it."""
+    if fcntl is not None:
+        flags = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+        fcntl.flock(fd, flags if blocking else flags | fcntl.LOCK_NB)
+        return
+    while True:
+        try:
+            _windows_locking(fd, msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK)
+            return
+        except OSError as exc:
+            # LK_LOCK gives up after about ten seconds; keep waiting like flock does
+            if not blocking or exc.errno != errno.EDEADLOCK:
+                raise
+
+
+def unlock(fd: int) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        _windows_locking(fd, msvcrt.LK_UNLCK)
+
+
+def _windows_locking(fd: int, mode: int) -> None:
+    # msvcrt locks from the current position; put it back so appends are unaffected
+    position = os.lseek(fd, 0, os.SEEK_CUR)
+    os.lseek(fd, _WINDOWS_LOCK_OFFSET, os.SEEK_SET)
+    try:
+        msvcrt.locking(fd, mode, 1)
+    finally:
+        os.lseek(fd, position, os.SEEK_SET)
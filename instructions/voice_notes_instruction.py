@@ -2,6 +2,13 @@ SUMMARY_INSTRUCTION = (
     "Summarize the user's notes into concise bullet points. Keep it short and actionable."
 )
 
+SESSION_SUMMARY_INSTRUCTION = (
+    "You keep a running summary of a note-taking session as concise bullet points. "
+    "You are given the current session notes and the user's new note. "
+    "Return the complete updated notes: merge the new note in, update or drop bullets it supersedes, "
+    "and keep existing bullets word for word when nothing changed. Keep it short and actionable."
+)
+
 GREETING_TEXT = "Hello, may I help you with your notes today? You can ask me to summarize, organize, or find specific information in your notes."
 
 FOLLOWUP_PROMPT = "Anything else to add? You can continue, or say we're all set and done."
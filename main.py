@@ -1,117 +1,400 @@
 import argparse
+import io
 import os
-import tempfile
+import struct
+import threading
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from cli import UPLOAD_FORMATS, parse_args
+
+if __name__ == "__main__":
+    # validate the command line before the heavy imports below, so --help and
+    # usage errors return immediately; main() parses it again (cheap)
+    parse_args()
 
 import numpy as np
-import sounddevice as sd
 import soundfile as sf
 from openai import OpenAI
 
+from audio_engine import AudioBackend, AudioEngine, NullBackend, SoundDeviceBackend, WavFileBackend, resample
+from api_client import ApiCaller, StagePolicy, build_client, call_api, warm_connection
+from batch import run_batch
+from chunked_stt import transcribe_chunked
+from done_detection import DonePhraseMatcher, DoneProbe
+from profiling import SessionProfiler
+from sentence_pipeline import SentenceSplitter, iter_summary_sentences, speak_sentences
+from session_engine import OverlappedSession, TurnResult
+from silence_gate import analyze_recording, calibrate_threshold, frame_energy_db, normalize_gain
+from streaming_tts import PCM_SAMPLERATE, stream_speech
+from summary_cache import SummaryCache
+from tts_cache import TTSCache
+
 from dotenv import load_dotenv
 load_dotenv(".env.local")
 
-from instructions import voice_notes_instruction as instruction_module
-SUMMARY_INSTRUCTION = instruction_module.SUMMARY_INSTRUCTION
-GREETING_TEXT = instruction_module.GREETING_TEXT
-FOLLOWUP_PROMPT = instruction_module.FOLLOWUP_PROMPT
-CLOSING_TEXT = instruction_module.CLOSING_TEXT
-DONE_PHRASES = instruction_module.DONE_PHRASES
-
 
-def record_audio(seconds: int, samplerate: int = 16000) -> np.ndarray:
+def record_audio(
+    audio: AudioEngine,
+    seconds: float,
+    stop_event: threading.Event | None = None,
+    block_ms: int = 50,
+) -> np.ndarray:
     if seconds <= 0:
         raise ValueError("Recording duration must be greater than zero")
 
-    recording = sd.rec(int(seconds * samplerate), samplerate=samplerate, channels=1, dtype="float32")
-    sd.wait()
-    return recording.squeeze()
-
-
-def save_wav(samples: np.ndarray, samplerate: int) -> str:
-    fd, path = tempfile.mkstemp(suffix=".wav")
-    os.close(fd)
-    sf.write(path, samples, samplerate)
-    return path
-
-
-def transcribe_audio(client: OpenAI, wav_path: str, model: str) -> str:
-    with open(wav_path, "rb") as audio_file:
-        result = client.audio.transcriptions.create(model=model, file=audio_file)
+    recording = np.empty(int(seconds * audio.input_rate), dtype=np.float32)
+    block_size = max(1, int(audio.input_rate * block_ms / 1000))
+    written = 0
+    with audio.open_input() as stream:
+        while written < len(recording) and not (stop_event is not None and stop_event.is_set()):
+            try:
+                n, _overflowed = stream.read_into(recording[written:written + block_size])
+            except EOFError:
+                # input ran out mid-recording: keep what was captured; the next capture ends the session
+                if not written:
+                    raise
+                break
+            written += n
+    return recording[:written]
+
+
+def record_until_silence(
+    audio: AudioEngine,
+    max_seconds: float = 120.0,
+    silence_seconds: float = 1.0,
+    threshold_db: float = -45.0,
+    block_ms: int = 30,
+    preroll_seconds: float = 0.3,
+    stop_event: threading.Event | None = None,
+    pause_seconds: float = 0.35,
+    on_pause: Callable[[np.ndarray], None] | None = None,
+    on_resume: Callable[[], None] | None = None,
+) -> np.ndarray:
+    """Record until the speaker stops talking instead of for a fixed window.
+
+    Microphone blocks are copied from the engine's input ring straight into a
+    buffer preallocated for ``max_seconds`` and classified with a simple energy VAD. Once speech has been heard, the
+    turn ends after ``silence_seconds`` of trailing silence. Leading dead air is
+    dropped except for a short pre-roll so the first syllable is not clipped.
+    Setting ``stop_event`` ends the recording at the next block.
+
+    ``on_pause`` is called with the speech captured so far (a view into the
+    buffer, pre-roll included) each time the speaker has been quiet for
+    ``pause_seconds``, and ``on_resume`` when speech follows such a pause;
+    the done-phrase probe uses them to listen while the turn is still open.
+    """
+    if max_seconds <= 0:
+        raise ValueError("Maximum recording duration must be greater than zero")
+    if silence_seconds <= 0:
+        raise ValueError("Trailing silence duration must be greater than zero")
+
+    samplerate = audio.input_rate
+    block_size = max(1, int(samplerate * block_ms / 1000))
+    frame_size = max(1, int(samplerate * 0.01))
+    capacity = int(max_seconds * samplerate)
+    buffer = np.empty(capacity, dtype=np.float32)
+    silence_blocks_needed = max(1, int(round(silence_seconds * 1000 / block_ms)))
+    pause_blocks_needed = max(1, int(round(pause_seconds * 1000 / block_ms)))
+    preroll = int(preroll_seconds * samplerate)
+
+    written = 0
+    speech_start = None
+    speech_end = 0
+    silent_blocks = 0
+
+    with audio.open_input() as stream:
+        while written < capacity and not (stop_event is not None and stop_event.is_set()):
+            try:
+                n, _overflowed = stream.read_into(buffer[written:written + block_size])
+            except EOFError:
+                # input ran out mid-note: keep the speech heard so far; the next capture ends the session
+                if speech_start is None:
+                    raise
+                break
+            block = buffer[written:written + n]
+
+            voiced = np.mean(frame_energy_db(block, frame_size) > threshold_db) >= 0.5
+            written += n
+            if voiced:
+                if speech_start is None:
+                    speech_start = written - n
+                elif silent_blocks >= pause_blocks_needed and on_resume is not None:
+                    on_resume()
+                speech_end = written
+                silent_blocks = 0
+            elif speech_start is not None:
+                silent_blocks += 1
+                if silent_blocks == pause_blocks_needed and on_pause is not None:
+                    on_pause(buffer[max(0, speech_start - preroll):speech_end])
+                if silent_blocks >= silence_blocks_needed:
+                    break
+
+    if speech_start is None:
+        return buffer[:written]
+
+    start = max(0, speech_start - preroll)
+    end = min(written, speech_end + block_size)
+    return buffer[start:end]
+
+
+def trim_silence(
+    samples: np.ndarray,
+    samplerate: int,
+    threshold_db: float = -45.0,
+    pad_seconds: float = 0.15,
+) -> np.ndarray:
+    """Drop leading and trailing frames below ``threshold_db`` (returns a view)."""
+    frame_size = max(1, int(samplerate * 0.01))
+    voiced = np.flatnonzero(frame_energy_db(samples, frame_size) > threshold_db)
+    if voiced.size == 0:
+        return samples[:0]
+    pad = int(pad_seconds * samplerate)
+    start = max(0, voiced[0] * frame_size - pad)
+    end = min(len(samples), (voiced[-1] + 1) * frame_size + pad)
+    return samples[start:end]
+
+
+def downsample(samples: np.ndarray, samplerate: int, target_rate: int) -> tuple[np.ndarray, int]:
+    """Reduce the sample rate for upload; speech models do not need more than 16 kHz."""
+    if target_rate <= 0 or samplerate <= target_rate:
+        return samples, samplerate
+    if samplerate % target_rate == 0:
+        # integer factor: average each group of samples, which doubles as a cheap low-pass
+        factor = samplerate // target_rate
+        usable = len(samples) - len(samples) % factor
+        return samples[:usable].reshape(-1, factor).mean(axis=1, dtype=np.float32), target_rate
+    positions = np.arange(0, len(samples), samplerate / target_rate)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32), target_rate
+
+
+def encode_audio(samples: np.ndarray, samplerate: int, fmt: str = "wav", label: str = "recording") -> io.BytesIO:
+    container, subtype, suffix = UPLOAD_FORMATS[fmt]
+    buffer = io.BytesIO()
+    sf.write(buffer, samples, samplerate, format=container, subtype=subtype)
+    buffer.seek(0)
+    # the OpenAI SDK infers the upload's content type from the file name
+    buffer.name = f"{label}{suffix}"
+    return buffer
+
+
+def decode_wav(data: bytes) -> tuple[np.ndarray, int]:
+    """Decode WAV bytes, returning a zero-copy int16 view for plain PCM16 data."""
+    view = memoryview(data)
+    if len(data) >= 12 and data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+        offset = 12
+        samplerate = channels = bits = fmt_tag = None
+        while offset + 8 <= len(data):
+            chunk_id = data[offset:offset + 4]
+            (chunk_size,) = struct.unpack_from("<I", data, offset + 4)
+            body = offset + 8
+            if chunk_id == b"fmt ":
+                fmt_tag, channels, samplerate = struct.unpack_from("<HHI", data, body)
+                (bits,) = struct.unpack_from("<H", data, body + 14)
+            elif chunk_id == b"data":
+                if fmt_tag != 1 or bits != 16:
+                    break
+                # streamed responses may carry a placeholder data size; clamp to what arrived
+                end = min(len(data), body + chunk_size)
+                end -= (end - body) % (2 * channels)
+                samples = np.frombuffer(view[body:end], dtype="<i2")
+                if channels > 1:
+                    samples = samples.reshape(-1, channels)
+                return samples, samplerate
+            offset = body + chunk_size + (chunk_size & 1)
+
+    samples, samplerate = sf.read(io.BytesIO(data), dtype="float32")
+    return samples, samplerate
+
+
+def keep_audio(directory: str | None, label: str, data: bytes | memoryview, suffix: str = ".wav") -> None:
+    """Write a copy of a buffer to ``directory`` when --keep-audio is set."""
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    stamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S-%f")
+    with open(os.path.join(directory, f"{stamp}_{label}{suffix}"), "wb") as f:
+        f.write(data)
+
+
+def transcribe_audio(client: OpenAI, audio_file: io.BytesIO, model: str, api: ApiCaller | None = None) -> str:
+    # immutable (name, bytes) upload so retries and hedged duplicates never share a file position
+    upload = (audio_file.name, audio_file.getvalue())
+    result = call_api(
+        api,
+        "stt",
+        lambda timeout: client.audio.transcriptions.create(model=model, file=upload, timeout=timeout),
+    )
     return result.text.strip()
 
 
-def summarize_text(client: OpenAI, text: str, model: str, instruction: str) -> str:
-    response = client.responses.create(
-        model=model,
-        input=[
-            {
-                "role": "system",
-                "content": instruction,
-            },
-            {"role": "user", "content": text},
-        ],
+def summarize_text(client: OpenAI, text: str, model: str, instruction: str, api: ApiCaller | None = None) -> str:
+    response = call_api(
+        api,
+        "summary",
+        lambda timeout: client.responses.create(
+            model=model,
+            input=[
+                {
+                    "role": "system",
+                    "content": instruction,
+                },
+                {"role": "user", "content": text},
+            ],
+            timeout=timeout,
+        ),
     )
     return response.output_text.strip()
 
 
-def synthesize_speech(client: OpenAI, text: str, model: str, voice: str) -> str:
-    response = client.audio.speech.create(
-        model=model,
-        voice=voice,
-        input=text,
-        response_format="wav",
+def synthesize_speech(
+    client: OpenAI,
+    text: str,
+    model: str,
+    voice: str,
+    api: ApiCaller | None = None,
+    profiler: SessionProfiler | None = None,
+) -> bytes:
+    def request(timeout) -> tuple[bytes, float | None]:
+        # read the body incrementally so time-to-first-byte can be measured
+        start = time.perf_counter()
+        first_byte = None
+        chunks = []
+        with client.audio.speech.with_streaming_response.create(
+            model=model,
+            voice=voice,
+            input=text,
+            response_format="wav",
+            timeout=timeout,
+        ) as response:
+            for chunk in response.iter_bytes():
+                if first_byte is None:
+                    first_byte = time.perf_counter() - start
+                chunks.append(chunk)
+        return b"".join(chunks), first_byte
+
+    start = time.perf_counter()
+    audio, first_byte = call_api(api, "tts", request)
+    if profiler is not None:
+        if first_byte is not None:
+            profiler.record("tts_first_byte", first_byte)
+        profiler.record("tts_total", time.perf_counter() - start, nbytes=len(audio))
+    return audio
+
+
+def play_wav(data: bytes, audio: AudioEngine, profiler: SessionProfiler | None = None) -> None:
+    samples, samplerate = decode_wav(data)
+    start = time.perf_counter()
+    if samples.ndim > 1:
+        # downmix in the input's own units so int16 stays int16 instead of being treated as float
+        samples = samples.mean(axis=1).astype(samples.dtype)
+    if samples.dtype != np.int16:
+        samples = (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16)
+    # the engine's output stream is already open at the speech endpoint's rate
+    audio.play(resample(samples, samplerate, audio.output_rate))
+    if profiler is not None:
+        profiler.record("playback", time.perf_counter() - start, audio_seconds=len(samples) / samplerate)
+
+
+@dataclass
+class SessionContext:
+    """Everything a session's stages share, built once in main()."""
+
+    client: OpenAI
+    args: argparse.Namespace
+    api: ApiCaller
+    tts_cache: TTSCache | None = None
+    summary_cache: SummaryCache | None = None
+    audio: AudioEngine | None = None
+    # running notes for --session-summary; only the summary worker updates it
+    session_summary: str = ""
+    profiler: SessionProfiler = field(default_factory=SessionProfiler)
+    done_matcher: DonePhraseMatcher = field(default_factory=lambda: DonePhraseMatcher([]))
+    # synthesized fixed prompts by text, possibly still rendering in the background
+    phrase_audio: dict[str, Future] = field(default_factory=dict)
+    background: ThreadPoolExecutor = field(
+        default_factory=lambda: ThreadPoolExecutor(max_workers=2, thread_name_prefix="background")
     )
-    fd, path = tempfile.mkstemp(suffix=".wav")
-    os.close(fd)
-    response.stream_to_file(path)
-    return path
-
-
-def play_wav(path: str) -> None:
-    data, samplerate = sf.read(path, dtype="float32")
-    sd.play(data, samplerate)
-    sd.wait()
-
-
-def parse_args() -> argparse.Namespace:
-    parser = argparse.ArgumentParser(description="Record voice notes, summarize, and play TTS.")
-    parser.add_argument("--seconds", type=int, default=10, help="Recording duration in seconds")
-    parser.add_argument("--samplerate", type=int, default=16000, help="Recording sample rate")
-    parser.add_argument("--stt-model", default="gpt-4o-mini-transcribe", help="OpenAI STT model")
-    parser.add_argument("--summary-model", default="gpt-4o-mini", help="OpenAI model for summary")
-    parser.add_argument("--tts-model", default="gpt-4o-mini-tts", help="OpenAI TTS model")
-    parser.add_argument("--voice", default="alloy", help="TTS voice")
-    parser.add_argument(
-        "--instruction",
-        default=SUMMARY_INSTRUCTION,
-        help="System instruction for the summary step",
-    )
-    parser.add_argument(
-        "--greeting",
-        default=GREETING_TEXT,
-        help="Greeting text spoken before recording",
-    )
-    parser.add_argument(
-        "--followup",
-        default=FOLLOWUP_PROMPT,
-        help="Prompt spoken after each summary",
-    )
-    parser.add_argument(
-        "--closing",
-        default=CLOSING_TEXT,
-        help="Closing text spoken when the session ends",
-    )
-    parser.add_argument(
-        "--done-phrases",
-        default=", ".join(DONE_PHRASES),
-        help="Comma-separated phrases that end the session",
+
+
+def build_audio_backend(args: argparse.Namespace) -> AudioBackend:
+    if args.audio_backend == "wav":
+        return WavFileBackend(args.input_wav, args.output_wav, realtime=args.realtime)
+    if args.audio_backend == "null":
+        return NullBackend(realtime=args.realtime)
+    return SoundDeviceBackend()
+
+
+def build_api_caller(args: argparse.Namespace) -> ApiCaller:
+    return ApiCaller(
+        {
+            "stt": StagePolicy(timeout=args.stt_timeout, retries=args.retries, hedge=args.hedge),
+            "summary": StagePolicy(timeout=args.summary_timeout, retries=args.retries),
+            "tts": StagePolicy(timeout=args.tts_timeout, retries=args.retries, hedge=args.hedge),
+            # streamed responses are consumed incrementally, so they are retried but never duplicated
+            "tts_stream": StagePolicy(timeout=args.tts_timeout, retries=args.retries),
+        },
+        hedge_after=args.hedge_after,
     )
-    return parser.parse_args()
 
 
-def is_done(transcript: str, done_phrases: list[str]) -> bool:
-    text = transcript.strip().lower()
-    return any(phrase in text for phrase in done_phrases)
+def synthesize_phrase(ctx: SessionContext, text: str) -> bytes:
+    """Synthesize a fixed prompt once per session (or prefetched), then play it from memory."""
+    future = ctx.phrase_audio.get(text)
+    if future is not None:
+        try:
+            return future.result()
+        except Exception:
+            # a failed prefetch is retried in the foreground, where errors surface normally
+            ctx.phrase_audio.pop(text, None)
+    audio = render_phrase(ctx, text)
+    future = Future()
+    future.set_result(audio)
+    ctx.phrase_audio[text] = future
+    return audio
+
+
+def prefetch_phrase(ctx: SessionContext, text: str) -> None:
+    """Start synthesizing a fixed prompt in the background so it is ready when needed."""
+    if text and text not in ctx.phrase_audio:
+        ctx.phrase_audio[text] = ctx.background.submit(render_phrase, ctx, text)
+
+
+def render_phrase(ctx: SessionContext, text: str) -> bytes:
+    """Synthesize a fixed prompt, reusing the on-disk TTS cache when configured."""
+    args = ctx.args
+    if ctx.tts_cache is not None:
+        cached = ctx.tts_cache.get(args.tts_model, args.voice, text)
+        if cached is not None:
+            ctx.profiler.count("tts_cache_hits")
+            return cached
+        ctx.profiler.count("tts_cache_misses")
+    audio = synthesize_speech(ctx.client, text, model=args.tts_model, voice=args.voice, api=ctx.api, profiler=ctx.profiler)
+    if ctx.tts_cache is not None:
+        ctx.tts_cache.put(args.tts_model, args.voice, text, audio)
+    return audio
+
+
+def say_phrase(ctx: SessionContext, label: str, text: str) -> None:
+    audio = synthesize_phrase(ctx, text)
+    keep_audio(ctx.args.keep_audio, label, audio)
+    play_wav(audio, ctx.audio, ctx.profiler)
+
+
+def warm_tts_cache(ctx: SessionContext) -> None:
+    args = ctx.args
+    # defaults come from the instructions module; --greeting/--followup/--closing override them
+    phrases = [text for text in (args.greeting, args.followup, args.closing) if text]
+    for text in phrases:
+        if ctx.tts_cache.get(args.tts_model, args.voice, text) is not None:
+            print(f"Cached: {text}")
+            continue
+        print(f"Rendering: {text}")
+        render_phrase(ctx, text)
+    print(f"TTS cache ready in {ctx.tts_cache.directory}")
 
 
 def main() -> None:
@@ -120,22 +403,441 @@ def main() -> None:
     if not api_key:
         raise SystemExit("OPENAI_API_KEY is not set")
 
-    client = OpenAI(api_key=api_key)
+    ctx = SessionContext(
+        client=build_client(api_key, base_url=args.api_base_url),
+        args=args,
+        api=build_api_caller(args),
+        done_matcher=DonePhraseMatcher.from_csv(args.done_phrases),
+    )
+    if args.tts_cache_dir:
+        ctx.tts_cache = TTSCache(args.tts_cache_dir, max_bytes=int(args.tts_cache_max_mb * 1024 * 1024))
+    if args.summary_cache:
+        ctx.summary_cache = SummaryCache(
+            args.summary_cache,
+            ttl_seconds=args.summary_cache_ttl_hours * 3600,
+            max_entries=args.summary_cache_max_entries,
+        )
+
+    try:
+        if args.command == "batch":
+            if not args.input_dir:
+                raise SystemExit("batch requires --input-dir")
+            run_batch(
+                args.input_dir,
+                args.output,
+                args.manifest or f"{args.output}.manifest",
+                lambda path: process_recording(ctx, path),
+                workers=args.batch_workers,
+                per_minute=args.rate_limit,
+            )
+        elif args.command == "warm-cache":
+            if ctx.tts_cache is None:
+                raise SystemExit("warm-cache requires --tts-cache-dir")
+            warm_tts_cache(ctx)
+        else:
+            ctx.audio = AudioEngine(
+                build_audio_backend(args),
+                input_rate=args.samplerate,
+                output_rate=PCM_SAMPLERATE,
+                prebuffer_ms=args.jitter_ms,
+            )
+            try:
+                run_session(ctx)
+            except EOFError:
+                print("Audio input ended.")
+            except TimeoutError as exc:
+                print(f"Audio input stopped: {exc}")
+            finally:
+                # also on Ctrl-C, so the notes taken so far are not lost
+                write_session_notes(ctx)
+    finally:
+        if ctx.audio is not None:
+            ctx.audio.close()
+        ctx.background.shutdown(wait=False, cancel_futures=True)
+        ctx.api.close()
+        if ctx.summary_cache is not None:
+            ctx.summary_cache.close()
+            counters = ctx.profiler.counters
+            print(f"Summary cache: {counters['summary_cache_hits']} hits, {counters['summary_cache_misses']} misses")
+        if args.profile or args.profile_prometheus:
+            write_profile(ctx)
+
+
+def write_profile(ctx: SessionContext) -> None:
+    args = ctx.args
+    for stage, n in ctx.api.retries.items():
+        ctx.profiler.count(f"{stage}_retries", n)
+    for stage, n in ctx.api.hedges.items():
+        ctx.profiler.count(f"{stage}_hedged_requests", n)
+    print("Stage latency (seconds):")
+    print(ctx.profiler.format_table())
+    if args.profile:
+        with open(args.profile, "w", encoding="utf-8") as f:
+            f.write(ctx.profiler.to_json())
+        print(f"Profile written to {args.profile}")
+    if args.profile_prometheus:
+        with open(args.profile_prometheus, "w", encoding="utf-8") as f:
+            f.write(ctx.profiler.to_prometheus())
+        print(f"Prometheus metrics written to {args.profile_prometheus}")
+
+
+def build_done_probe(ctx: SessionContext, stop_event: threading.Event) -> DoneProbe | None:
+    """Return a probe that ends the capture early on a done phrase, if enabled for this session."""
+    args = ctx.args
+    if not (args.done_probe and args.capture == "vad" and ctx.done_matcher):
+        return None
+
+    def transcribe_partial(samples: np.ndarray) -> str:
+        upload_samples, upload_rate = downsample(samples, args.samplerate, args.upload_rate)
+        # a distinct file name lets a stub server tell probes from the turn's own upload
+        audio_buffer = encode_audio(upload_samples, upload_rate, fmt=args.upload_format, label="probe")
+        with ctx.profiler.time("done_probe", nbytes=audio_buffer.getbuffer().nbytes, audio_seconds=len(samples) / args.samplerate):
+            return transcribe_audio(ctx.client, audio_buffer, args.stt_model, api=ctx.api)
+
+    return DoneProbe(transcribe_partial, ctx.done_matcher, stop_event, args.samplerate, max_seconds=args.done_probe_max_seconds)
+
+
+def capture_turn(
+    ctx: SessionContext,
+    stop_event: threading.Event | None = None,
+    probe: DoneProbe | None = None,
+) -> tuple[np.ndarray, int] | None:
+    """Record one note and prepare it for upload; returns None if it was only silence."""
+    args = ctx.args
+    start = time.perf_counter()
+    if args.capture == "vad":
+        print(f"Listening... (stops after {args.silence_seconds:g}s of silence)")
+        samples = record_until_silence(
+            ctx.audio,
+            max_seconds=args.max_seconds,
+            silence_seconds=args.silence_seconds,
+            threshold_db=args.vad_threshold,
+            stop_event=stop_event,
+            pause_seconds=args.pause_seconds,
+            on_pause=probe.on_pause if probe is not None else None,
+            on_resume=probe.on_resume if probe is not None else None,
+        )
+        if probe is not None:
+            probe.cancel()
+    else:
+        print(f"Recording for {args.seconds} seconds...")
+        samples = record_audio(ctx.audio, args.seconds, stop_event=stop_event)
+    ctx.profiler.record("record", time.perf_counter() - start, audio_seconds=len(samples) / args.samplerate)
+    upload_samples, upload_rate = downsample(samples, args.samplerate, args.upload_rate)
+    upload_samples = gate_recording(ctx, upload_samples, upload_rate)
+    if upload_samples is None:
+        return None
+    return upload_samples, upload_rate
+
+
+def gate_recording(ctx: SessionContext, samples: np.ndarray, samplerate: int) -> np.ndarray | None:
+    """Drop silent or noise-only recordings locally, then trim and level the rest for upload."""
+    args = ctx.args
+    gate = analyze_recording(samples, samplerate, threshold_db=args.vad_threshold, min_speech_seconds=args.min_speech_seconds)
+    if not gate.speech:
+        ctx.profiler.count("stt_skipped_silence")
+        print(
+            f"Skipped as silence: {gate.voiced_seconds:.2f}s above {args.vad_threshold:.1f} dBFS "
+            f"(needs {args.min_speech_seconds:g}s); nothing uploaded"
+        )
+        return None
+    if args.trim:
+        samples = trim_silence(samples, samplerate, threshold_db=args.vad_threshold)
+    if args.normalize:
+        samples = normalize_gain(samples, gate)
+    return samples
+
+
+def transcribe_turn(ctx: SessionContext, captured: tuple[np.ndarray, int]) -> str:
+    args = ctx.args
+    samples, samplerate = captured
+    if args.keep_audio:
+        audio_buffer = encode_audio(samples, samplerate, fmt=args.upload_format)
+        keep_audio(args.keep_audio, "recording", audio_buffer.getbuffer(), suffix=UPLOAD_FORMATS[args.upload_format][2])
+
+    def transcribe_segment(segment: np.ndarray) -> str:
+        audio_seconds = len(segment) / samplerate
+        start = time.perf_counter()
+        audio_buffer = encode_audio(segment, samplerate, fmt=args.upload_format)
+        nbytes = audio_buffer.getbuffer().nbytes
+        ctx.profiler.record("encode", time.perf_counter() - start, nbytes=nbytes, audio_seconds=audio_seconds)
+        with ctx.profiler.time("stt", nbytes=nbytes, audio_seconds=audio_seconds):
+            return transcribe_audio(ctx.client, audio_buffer, args.stt_model, api=ctx.api)
+
+    # long dictations are split at quiet points and transcribed in parallel
+    return transcribe_chunked(
+        samples,
+        samplerate,
+        transcribe_segment,
+        chunk_seconds=args.chunk_seconds,
+        max_workers=args.stt_workers,
+    )
+
+
+def cached_summary(ctx: SessionContext, transcript: str, instruction: str | None = None) -> str | None:
+    """Look the transcript up in --summary-cache, counting the hit or miss."""
+    if ctx.summary_cache is None:
+        return None
+    summary = ctx.summary_cache.get(ctx.args.summary_model, instruction or ctx.args.instruction, transcript)
+    ctx.profiler.count("summary_cache_hits" if summary is not None else "summary_cache_misses")
+    return summary
+
+
+def store_summary(ctx: SessionContext, transcript: str, summary: str, instruction: str | None = None) -> None:
+    if ctx.summary_cache is not None and summary:
+        ctx.summary_cache.put(ctx.args.summary_model, instruction or ctx.args.instruction, transcript, summary)
+
+
+def summarize_turn(ctx: SessionContext, transcript: str) -> str:
+    if ctx.args.session_summary:
+        return update_session_summary(ctx, transcript)
+    return summarize_input(ctx, transcript, ctx.args.instruction)
+
+
+def summarize_input(ctx: SessionContext, text: str, instruction: str) -> str:
+    summary = cached_summary(ctx, text, instruction)
+    if summary is not None:
+        return summary
+    with ctx.profiler.time("summary", nbytes=len(text.encode("utf-8"))):
+        summary = summarize_text(ctx.client, text, ctx.args.summary_model, instruction, api=ctx.api)
+    store_summary(ctx, text, summary, instruction)
+    return summary
+
+
+def update_session_summary(ctx: SessionContext, transcript: str) -> str:
+    """Fold a new note into the running session summary and return the lines it added.
+
+    Only the previous summary and the new transcript are sent, so the prompt
+    stays about as large as the notes themselves however long the session runs.
+    """
+    previous = ctx.session_summary
+    if previous:
+        text = f"Current session notes:\n{previous}\n\nNew note:\n{transcript}"
+    else:
+        text = f"New note:\n{transcript}"
+    summary = summarize_input(ctx, text, ctx.args.session_instruction)
+    if not summary:
+        return summary
+    ctx.session_summary = summary
+    seen = {line.strip() for line in previous.splitlines()}
+    added = [line for line in summary.splitlines() if line.strip() and line.strip() not in seen]
+    # a note that only reworded existing bullets is confirmed by reading back the whole summary
+    return "\n".join(added) or summary
+
+
+def write_session_notes(ctx: SessionContext) -> None:
+    if not ctx.session_summary:
+        return
+    os.makedirs(ctx.args.notes_dir, exist_ok=True)
+    path = os.path.join(ctx.args.notes_dir, datetime.now().strftime("%Y-%m-%d_%H-%M-%S.txt"))
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(ctx.session_summary + "\n")
+    print(f"Session notes saved to: {path}")
+
+
+def process_recording(ctx: SessionContext, path: str) -> dict:
+    """Transcribe and summarize one recorded file for the batch command."""
+    args = ctx.args
+    samples, samplerate = sf.read(path, dtype="float32", always_2d=True)
+    samples = samples.mean(axis=1, dtype=np.float32)
+    record = {"audio_seconds": len(samples) / samplerate, "transcript": "", "summary": ""}
+
+    upload_samples, upload_rate = downsample(samples, samplerate, args.upload_rate)
+    upload_samples = gate_recording(ctx, upload_samples, upload_rate)
+    if upload_samples is None:
+        record["no_speech"] = True
+        return record
+
+    start = time.monotonic()
+    record["transcript"] = transcribe_turn(ctx, (upload_samples, upload_rate))
+    record["stt_seconds"] = time.monotonic() - start
+    if record["transcript"]:
+        start = time.monotonic()
+        record["summary"] = summarize_turn(ctx, record["transcript"])
+        record["summary_seconds"] = time.monotonic() - start
+    return record
+
+
+def speak_summary(ctx: SessionContext, summary: str) -> None:
+    args = ctx.args
+    if args.stream_tts:
+        print("Streaming TTS...")
+        stats = stream_speech(
+            ctx.client,
+            summary,
+            model=args.tts_model,
+            voice=args.voice,
+            player=ctx.audio,
+            api=ctx.api,
+        )
+        if stats.first_byte is not None:
+            ctx.profiler.record("tts_first_byte", stats.first_byte)
+        if stats.first_audio is not None:
+            ctx.profiler.record("tts_first_audio", stats.first_audio)
+        ctx.profiler.record("tts_total", stats.synthesis, nbytes=stats.bytes)
+        ctx.profiler.record("playback", stats.total, audio_seconds=stats.bytes / (2 * ctx.audio.output_rate))
+        first_audio = f"{stats.first_audio:.2f}s" if stats.first_audio is not None else "n/a"
+        print(
+            f"TTS first audio after {first_audio}, synthesis {stats.synthesis:.2f}s, "
+            f"playback done after {stats.total:.2f}s ({stats.underruns} underruns)"
+        )
+    else:
+        print("Generating TTS...")
+        tts_audio = synthesize_speech(
+            ctx.client,
+            summary,
+            model=args.tts_model,
+            voice=args.voice,
+            api=ctx.api,
+            profiler=ctx.profiler,
+        )
+        keep_audio(args.keep_audio, "summary", tts_audio)
+
+        print("Playing TTS...")
+        play_wav(tts_audio, ctx.audio, ctx.profiler)
+
+
+def speak_summary_pipelined(ctx: SessionContext, transcript: str) -> str:
+    """Speak the summary sentence by sentence while the rest is still being generated."""
+    args = ctx.args
+
+    def timed_sentences():
+        start = time.perf_counter()
+        yield from iter_summary_sentences(ctx.client, transcript, args.summary_model, args.instruction, api=ctx.api)
+        ctx.profiler.record("summary", time.perf_counter() - start, nbytes=len(transcript.encode("utf-8")))
+
+    cached = cached_summary(ctx, transcript)
+    if cached is not None:
+        summary = speak_sentences_of(ctx, cached)
+    else:
+        summary = "\n".join(speak_pipelined(ctx, timed_sentences()))
+        store_summary(ctx, transcript, summary)
+    return summary
+
+
+def speak_sentences_of(ctx: SessionContext, summary: str) -> str:
+    """Speak a finished summary sentence by sentence, so playback starts after the first one."""
+    splitter = SentenceSplitter()
+    return "\n".join(speak_pipelined(ctx, iter(splitter.feed(summary) + splitter.flush())))
+
+
+def speak_pipelined(ctx: SessionContext, sentences: Iterator[str]) -> list[str]:
+    """Synthesize up to --tts-in-flight sentences ahead of playback; returns the sentences spoken."""
+    args = ctx.args
+
+    def synthesize(sentence: str) -> bytes:
+        return synthesize_speech(
+            ctx.client,
+            sentence,
+            model=args.tts_model,
+            voice=args.voice,
+            api=ctx.api,
+            profiler=ctx.profiler,
+        )
+
+    def play(audio: bytes) -> None:
+        keep_audio(args.keep_audio, "summary", audio)
+        play_wav(audio, ctx.audio, ctx.profiler)
+
+    return speak_sentences(
+        sentences,
+        synthesize,
+        play,
+        max_in_flight=args.tts_in_flight,
+        on_sentence=lambda _index, sentence: print(sentence),
+    )
 
+
+def prewarm_connection(ctx: SessionContext) -> None:
+    seconds = warm_connection(ctx.client, timeout=ctx.args.stt_timeout)
+    if seconds is not None:
+        ctx.profiler.record("connect", seconds)
+
+
+def run_overlapped_session(ctx: SessionContext) -> None:
+    args = ctx.args
+
+    def on_result(result: TurnResult) -> None:
+        if not result.transcript:
+            print(f"Note {result.turn}: no transcription returned.")
+            return
+        print(f"Transcript (note {result.turn}):")
+        print(result.transcript)
+        if args.pipeline:
+            # the summary was generated in the background; only its speech is pipelined
+            print("Summary (spoken sentence by sentence):")
+            speak_sentences_of(ctx, result.summary)
+        else:
+            print("Summary:")
+            print(result.summary)
+            speak_summary(ctx, result.summary)
+        if args.followup:
+            print("Asking follow-up...")
+            say_phrase(ctx, "followup", args.followup)
+
+    def on_close() -> None:
+        print("Closing...")
+        say_phrase(ctx, "closing", args.closing)
+
+    def capture(stop_event: threading.Event) -> tuple[np.ndarray, int] | None:
+        # a confirmed probe sets the session's stop event, which closes it after in-flight turns
+        probe = build_done_probe(ctx, stop_event)
+        captured = capture_turn(ctx, stop_event, probe)
+        if probe is not None and probe.confirmed:
+            print(f"Heard: {probe.transcript}")
+            ctx.profiler.count("done_probe_early_stops")
+            return None
+        if captured is None and not stop_event.is_set():
+            print("Only silence recorded; try again.")
+        return captured
+
+    OverlappedSession(
+        capture=capture,
+        transcribe=lambda captured: transcribe_turn(ctx, captured),
+        summarize=lambda transcript: summarize_turn(ctx, transcript),
+        is_done=ctx.done_matcher.search,
+        on_result=on_result,
+        on_close=on_close,
+    ).run()
+
+
+def run_session(ctx: SessionContext) -> None:
+    args = ctx.args
+    if args.prewarm:
+        # connect while the greeting plays so the first STT upload reuses the connection
+        ctx.background.submit(prewarm_connection, ctx)
+    if args.calibrate:
+        print("Calibrating... stay quiet for a second")
+        ambient = record_audio(ctx.audio, 1)
+        args.vad_threshold = calibrate_threshold(ambient, args.samplerate)
+        print(f"Speech threshold set to {args.vad_threshold:.1f} dBFS")
     if args.greeting:
         print("Saying greeting...")
-        hello_path = synthesize_speech(client, args.greeting, model=args.tts_model, voice=args.voice)
-        play_wav(hello_path)
+        say_phrase(ctx, "greeting", args.greeting)
+    if args.done_probe and args.closing:
+        # an early done should close immediately, not wait on TTS
+        prefetch_phrase(ctx, args.closing)
 
-    done_phrases = [phrase.strip().lower() for phrase in args.done_phrases.split(",") if phrase.strip()]
+    if args.overlap:
+        run_overlapped_session(ctx)
+        return
 
     while True:
-        print(f"Recording for {args.seconds} seconds...")
-        samples = record_audio(args.seconds, samplerate=args.samplerate)
-        wav_path = save_wav(samples, samplerate=args.samplerate)
+        probe = build_done_probe(ctx, threading.Event())
+        captured = capture_turn(ctx, probe.stop_event if probe is not None else None, probe)
+        if probe is not None and probe.confirmed:
+            print("Transcript:")
+            print(probe.transcript)
+            ctx.profiler.count("done_probe_early_stops")
+            print("Closing...")
+            say_phrase(ctx, "closing", args.closing)
+            break
+        if captured is None:
+            print("Only silence recorded; try again.")
+            continue
 
         print("Transcribing...")
-        transcript = transcribe_audio(client, wav_path, args.stt_model)
+        transcript = transcribe_turn(ctx, captured)
         if not transcript:
             print("No transcription returned; try again.")
             continue
@@ -143,32 +845,24 @@ def main() -> None:
         print("Transcript:")
         print(transcript)
 
-        if done_phrases and is_done(transcript, done_phrases):
+        if ctx.done_matcher.search(transcript):
             print("Closing...")
-            closing_path = synthesize_speech(client, args.closing, model=args.tts_model, voice=args.voice)
-            play_wav(closing_path)
+            say_phrase(ctx, "closing", args.closing)
             break
 
-        print("Summarizing...")
-        summary = summarize_text(client, transcript, args.summary_model, args.instruction)
-        print("Summary:")
-        print(summary)
-
-        print("Generating TTS...")
-        tts_path = synthesize_speech(client, summary, model=args.tts_model, voice=args.voice)
-
-        print("Playing TTS...")
-        play_wav(tts_path)
+        if args.pipeline and not args.session_summary:
+            print("Summary (spoken as it is generated):")
+            speak_summary_pipelined(ctx, transcript)
+        else:
+            print("Summarizing...")
+            summary = summarize_turn(ctx, transcript)
+            print("Summary:")
+            print(summary)
+            speak_summary(ctx, summary)
 
         if args.followup:
             print("Asking follow-up...")
-            followup_path = synthesize_speech(
-                client,
-                args.followup,
-                model=args.tts_model,
-                voice=args.voice,
-            )
-            play_wav(followup_path)
+            say_phrase(ctx, "followup", args.followup)
 
 
 if __name__ == "__main__":
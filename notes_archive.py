@@ -0,0 +1,252 @@
+"""Compressed archive of notes sessions with a memory-mapped session index.
+
+Every session is one gzip member of JSONL records (role, timestamp, text and,
+for agent replies, the latency since the user's turn) appended to
+``sessions.gz``. ``sessions.idx`` is an append-only table of fixed-width
+rows, one per session, with its offset and size in the data file plus its
+start and end time, turn counts and a short title. Listing or filtering
+sessions by date reads only the index through ``mmap``; reading one session
+seeks to its offset and decompresses that member alone. Writers in every
+process hold a file lock on ``sessions.idx`` while appending:
+
+    uv run notes_archive.py convert             # archive the existing .txt notes
+    uv run notes_archive.py list --since 2025-01-01
+    uv run notes_archive.py show 2025-01-02_10-00-00
+"""
+import argparse
+import gzip
+import json
+import mmap
+import os
+import re
+import threading
+from datetime import datetime
+
+import numpy as np
+
+import file_lock
+from notes_index import NOTES_SUFFIX, note_started
+
+DATA_NAME = "sessions.gz"
+INDEX_NAME = "sessions.idx"
+TITLE_BYTES = 80
+
+INDEX_DTYPE = np.dtype(
+    [
+        ("started", "<f8"),
+        ("ended", "<f8"),
+        ("offset", "<u8"),
+        ("length", "<u8"),
+        ("records", "<u4"),
+        ("user_turns", "<u4"),
+        ("agent_turns", "<u4"),
+        ("session", "S28"),
+        ("title", f"S{TITLE_BYTES}"),
+    ]
+)
+
+_NOTE_LINE = re.compile(r"\[(\w+)\] (.*)")
+
+
+def with_latency(records: list[dict]) -> list[dict]:
+    """Add ``latency``: seconds from the end of each user turn to the agent's reply."""
+    last_user = None
+    for record in records:
+        if record["role"] == "USER":
+            last_user = record["ts"]
+        elif record["role"] == "AGENT" and last_user is not None:
+            record["latency"] = round(record["ts"] - last_user, 3)
+            last_user = None
+    return records
+
+
+def parse_notes_file(path: str, started: float) -> list[dict]:
+    """Records from a saved ``.txt`` notes file; continuation lines join the line above."""
+    records = []
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f.read().splitlines():
+            match = _NOTE_LINE.fullmatch(line)
+            if match:
+                records.append({"role": match.group(1), "ts": started, "text": match.group(2)})
+            elif records and line.strip():
+                records[-1]["text"] += "\n" + line
+    return records
+
+
+def _title(records: list[dict]) -> bytes:
+    text = next((r["text"] for r in records if r["role"] == "USER"), records[0]["text"] if records else "")
+    encoded = " ".join(text.split()).encode("utf-8")[:TITLE_BYTES]
+    # never cut a character in half
+    return encoded.decode("utf-8", errors="ignore").encode("utf-8")
+
+
+class NotesArchive:
+    """Append-only session archive in ``directory``; safe to share between threads and processes."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.data_path = os.path.join(directory, DATA_NAME)
+        self.index_path = os.path.join(directory, INDEX_NAME)
+        self._lock = threading.Lock()
+        # a crash mid-append can leave a partial index row; drop it
+        with open(self.index_path, "ab") as f:
+            file_lock.lock(f.fileno())
+            size = os.fstat(f.fileno()).st_size
+            f.truncate(size - size % INDEX_DTYPE.itemsize)
+        self._mapped_size = -1
+        self._map: mmap.mmap | None = None
+        self._index = np.zeros(0, INDEX_DTYPE)
+
+    def _rows(self) -> np.ndarray:
+        """The whole index as a structured array backed by the mmap (remapped when it grows)."""
+        size = os.path.getsize(self.index_path)
+        if size != self._mapped_size:
+            self._index = None  # release the buffer before its mmap is closed
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            if size:
+                with open(self.index_path, "rb") as f:
+                    self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._index = np.frombuffer(self._map, dtype=INDEX_DTYPE, count=size // INDEX_DTYPE.itemsize)
+            else:
+                self._index = np.zeros(0, INDEX_DTYPE)
+            self._mapped_size = size
+        return self._index
+
+    def __contains__(self, session: str) -> bool:
+        with self._lock:
+            return bool(np.any(self._rows()["session"] == session.encode("utf-8")))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._rows())
+
+    def append(self, session: str, records: list[dict], started: float | None = None) -> bool:
+        """Archive one session; returns False if ``session`` is already archived."""
+        key = session.encode("utf-8")
+        if len(key) > INDEX_DTYPE["session"].itemsize:
+            raise ValueError(f"session name too long: {session}")
+        payload = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        member = gzip.compress(payload.encode("utf-8"), mtime=0)
+        timestamps = [record["ts"] for record in records]
+        row = np.zeros(1, INDEX_DTYPE)
+        row["started"] = started if started is not None else min(timestamps, default=0.0)
+        row["ended"] = max(timestamps, default=row["started"][0])
+        row["length"] = len(member)
+        row["records"] = len(records)
+        row["user_turns"] = sum(record["role"] == "USER" for record in records)
+        row["agent_turns"] = sum(record["role"] == "AGENT" for record in records)
+        row["session"] = key
+        row["title"] = _title(records)
+        with self._lock, open(self.index_path, "ab") as index:
+            # held across the check and both writes, so another process can neither
+            # archive the same session nor interleave its data with ours
+            file_lock.lock(index.fileno())
+            if np.any(self._rows()["session"] == key):
+                return False
+            # data first, then the index row that points at it: a crash in between
+            # only leaves unreferenced bytes at the end of the data file
+            with open(self.data_path, "ab") as f:
+                row["offset"] = f.seek(0, os.SEEK_END)
+                f.write(member)
+                f.flush()
+                os.fsync(f.fileno())
+            index.write(row.tobytes())
+            index.flush()
+            os.fsync(index.fileno())
+        return True
+
+    def sessions(self, since: datetime | None = None, until: datetime | None = None) -> np.ndarray:
+        """Index rows for sessions started in [since, until), oldest first."""
+        with self._lock:
+            rows = self._rows()
+            mask = np.ones(len(rows), dtype=bool)
+            if since is not None:
+                mask &= rows["started"] >= since.timestamp()
+            if until is not None:
+                mask &= rows["started"] < until.timestamp()
+            selected = rows[mask]
+            return selected[np.argsort(selected["started"], kind="stable")]
+
+    def read(self, session: str) -> list[dict]:
+        """The records of one session, decompressing only its member."""
+        with self._lock:
+            rows = self._rows()
+            matches = np.flatnonzero(rows["session"] == session.encode("utf-8"))
+            if not len(matches):
+                raise KeyError(session)
+            row = rows[matches[-1]]
+            offset, length = int(row["offset"]), int(row["length"])
+        with open(self.data_path, "rb") as f:
+            f.seek(offset)
+            payload = gzip.decompress(f.read(length))
+        return [json.loads(line) for line in payload.decode("utf-8").splitlines()]
+
+    def close(self) -> None:
+        with self._lock:
+            self._index = np.zeros(0, INDEX_DTYPE)
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._mapped_size = -1
+
+
+def convert_notes(archive: NotesArchive, notes_dir: str) -> tuple[int, int]:
+    """Archive every ``.txt`` notes file not archived yet; returns (archived, skipped)."""
+    archived = skipped = 0
+    for name in sorted(os.listdir(notes_dir)):
+        path = os.path.join(notes_dir, name)
+        if not name.endswith(NOTES_SUFFIX) or not os.path.isfile(path):
+            continue
+        started = note_started(name)
+        started_ts = started.timestamp() if started else os.path.getmtime(path)
+        if archive.append(name[: -len(NOTES_SUFFIX)], parse_notes_file(path, started_ts), started_ts):
+            archived += 1
+        else:
+            skipped += 1
+    return archived, skipped
+
+
+def _parse_date(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Manage the compressed notes archive.")
+    parser.add_argument("command", choices=["convert", "list", "show"])
+    parser.add_argument("session", nargs="?", default="", help="Session to print with the show command")
+    parser.add_argument(
+        "--notes-dir",
+        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "notes"),
+        help="Directory of saved .txt notes (default: notes/ next to this script)",
+    )
+    parser.add_argument("--archive-dir", default=None, help="Archive directory (default: <notes-dir>/archive)")
+    parser.add_argument("--since", type=_parse_date, default=None, help="List sessions started at or after this date")
+    parser.add_argument("--until", type=_parse_date, default=None, help="List sessions started before this date")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    archive = NotesArchive(args.archive_dir or os.path.join(args.notes_dir, "archive"))
+    try:
+        if args.command == "convert":
+            archived, skipped = convert_notes(archive, args.notes_dir)
+            print(f"Archived {archived} notes ({skipped} already archived); {len(archive)} sessions in {archive.directory}")
+        elif args.command == "list":
+            for row in archive.sessions(args.since, args.until):
+                started = datetime.fromtimestamp(row["started"]).strftime("%Y-%m-%d %H:%M")
+                session, title = row["session"].decode("utf-8"), row["title"].decode("utf-8", errors="replace")
+                print(f"{session}  {started}  {row['user_turns']:3d} user / {row['agent_turns']:3d} agent  {title}")
+        else:
+            for record in archive.read(args.session):
+                latency = f" (+{record['latency']:.2f}s)" if "latency" in record else ""
+                print(f"[{record['role']}]{latency} {record['text']}")
+    finally:
+        archive.close()
+
+
+if __name__ == "__main__":
+    main()
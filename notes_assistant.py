@@ -1,13 +1,26 @@
 import asyncio
+import functools
 import os
-from datetime import datetime
+import time
 
 from livekit import agents
-from livekit.agents import Agent, AgentSession, JobContext, RoomOutputOptions
-from livekit.plugins import openai, silero
+from livekit.agents import Agent, AgentSession, JobContext, RoomOutputOptions, RunContext, function_tool
+from livekit.plugins import openai
 import instructions.realtime_voice_instruction as instructionlib
 
 import instructions.voice_notes_instruction as instructionnotelib
+from notes_index import NotesIndex, note_started
+from notes_vectors import NotesVectorIndex, best_passage
+from transcript_events import USER, TranscriptEvent, TranscriptLog, normalize_role
+from agent_startup import StartupTimer, job_vad, prewarm
+from notes_archive import NotesArchive, with_latency
+from notes_journal import (
+    TranscriptJournal,
+    claim_orphaned_journals,
+    journal_line,
+    journal_started,
+    read_journal_records,
+)
 from instructions.voice_notes_instruction import (
     CLOSING_TEXT,
     DONE_PHRASES,
@@ -16,6 +29,54 @@ from instructions.voice_notes_instruction import (
     SUMMARY_INSTRUCTION,
 )
 
+# Save notes relative to this script so files are predictable regardless of CWD
+NOTES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "notes")
+JOURNAL_DIR = os.path.join(NOTES_DIR, ".journal")
+# how often the transcript journal is fsync'd; a hard kill loses at most this many seconds
+JOURNAL_FSYNC_SECONDS = float(os.getenv("NOTES_JOURNAL_FSYNC_SECONDS", "1.0"))
+# full-text index of NOTES_DIR used by the search_notes tool
+INDEX_PATH = os.getenv("NOTES_INDEX_PATH") or os.path.join(NOTES_DIR, ".index.sqlite3")
+# transcript events waiting for the consumer; when full, the event callback drains it itself
+TRANSCRIPT_QUEUE_SIZE = int(os.getenv("NOTES_TRANSCRIPT_QUEUE_SIZE", "256"))
+TRANSCRIPT_BATCH_SIZE = 64
+# also keep each session as compressed JSONL in notes/archive (see notes_archive.py)
+NOTES_ARCHIVE = os.getenv("NOTES_ARCHIVE", "").lower() in ("1", "true", "yes")
+ARCHIVE_DIR = os.getenv("NOTES_ARCHIVE_DIR") or os.path.join(NOTES_DIR, "archive")
+# offline similarity index of NOTES_DIR; catches paraphrases the keyword index misses
+VECTORS_PATH = os.getenv("NOTES_VECTORS_PATH") or os.path.join(NOTES_DIR, ".vectors")
+
+
+class NotesSearch:
+    """Keyword (FTS5) and similarity indexes over NOTES_DIR, updated together."""
+
+    def __init__(self):
+        self.keywords = NotesIndex(NOTES_DIR, INDEX_PATH)
+        self.similar = NotesVectorIndex(NOTES_DIR, VECTORS_PATH)
+
+    def add(self, path: str) -> None:
+        self.keywords.add(path)
+        self.similar.add(path)
+
+    def sync(self) -> None:
+        self.keywords.sync()
+        self.similar.sync()
+
+    def search(self, query: str, limit: int = 5) -> list[tuple[str, str]]:
+        """(note name, excerpt) pairs: keyword matches first, then similar notes."""
+        found = {hit.name: hit.snippet for hit in self.keywords.search(query, limit)}
+        query_vector = self.similar.query_vector(query)
+        for hit in self.similar.search(query, limit):
+            if len(found) >= limit:
+                break
+            if hit.name in found:
+                continue
+            try:
+                with open(os.path.join(NOTES_DIR, hit.name), encoding="utf-8", errors="replace") as f:
+                    found[hit.name] = best_passage(f.read(), query_vector)
+            except FileNotFoundError:
+                continue
+        return list(found.items())
+
 
 def build_agent_instructions() -> str:
     done_examples = ", ".join(DONE_PHRASES)
@@ -23,53 +84,49 @@ def build_agent_instructions() -> str:
         f"{instructionlib.instruction_text}\n"
         f"After each response, ask: {FOLLOWUP_PROMPT}\n"
         "If the user indicates they are finished, respond with the closing text "
-        f"and do not ask another question. Examples of done phrases: {done_examples}."
+        f"and do not ask another question. Examples of done phrases: {done_examples}.\n"
+        "When the user asks about something from an earlier session, look it up with the "
+        "search_notes tool instead of guessing."
     )
 
 
 class NotesAgent(Agent):
     def __init__(
-        self, ctx: JobContext, stop_event: asyncio.Event, transcript: list[str]
+        self,
+        ctx: JobContext,
+        stop_event: asyncio.Event,
+        transcript: TranscriptJournal,
+        notes_search: NotesSearch,
     ):
         super().__init__(instructions=build_agent_instructions())
         self.ctx = ctx
         self.stop_event = stop_event
         self.transcript = transcript
+        self.transcript_log = TranscriptLog()
+        self.notes_search = notes_search
         self.done_phrases = [phrase.lower() for phrase in DONE_PHRASES]
-        # track pending transcript handler tasks so we can await them on shutdown
-        self._pending_transcript_tasks: set[asyncio.Task] = set()
+        # one consumer drains transcript events in order; see enqueue_transcript_event
+        self._transcript_queue: asyncio.Queue = asyncio.Queue(maxsize=TRANSCRIPT_QUEUE_SIZE)
+        self._transcript_consumer: asyncio.Task | None = None
+        self._transcript_closed = False
+        self._transcript_flush: asyncio.Task | None = None
+        self.transcript_stats = {"events": 0, "batches": 0, "max_depth": 0, "inline_drains": 0}
 
     async def on_enter(self):
         if GREETING_TEXT:
             self.session.say(GREETING_TEXT, add_to_chat_ctx=True)
 
-        # ---- Transcript listener (sync wrapper, async inside) ----
-        def handle_transcript(event):
-            # schedule the transcript handler and keep track of the task so we don't lose data
-            task = asyncio.create_task(self.on_transcript(event))
-            self._pending_transcript_tasks.add(task)
+        # ---- Transcript listeners: queue the event, one consumer handles them in batches ----
+        self._transcript_consumer = asyncio.create_task(self.consume_transcript_events())
 
-            def _on_done(t: asyncio.Task):
-                try:
-                    self._pending_transcript_tasks.discard(t)
-                except Exception:
-                    pass
+        def handle_transcript(event):
+            self.enqueue_transcript_event(self.on_transcript, event)
 
-        self.session.on("transcript", handle_transcript)
+        self.session.on("user_input_transcribed", handle_transcript)
 
         # Also listen for conversation items so we capture agent (assistant) messages
         def handle_conversation_item(event):
-            # schedule conversation item handling similarly to transcript handling
-            task = asyncio.create_task(self.on_conversation_item(event))
-            self._pending_transcript_tasks.add(task)
-
-            def _on_done_conv(t: asyncio.Task):
-                try:
-                    self._pending_transcript_tasks.discard(t)
-                except Exception:
-                    pass
-
-            task.add_done_callback(_on_done_conv)
+            self.enqueue_transcript_event(self.on_conversation_item, event)
 
         try:
             self.session.on("conversation_item_added", handle_conversation_item)
@@ -78,47 +135,133 @@ class NotesAgent(Agent):
             print("Note: conversation_item_added event not supported by this session")
         print("📜 Transcript listener registered.")
 
-    async def on_transcript(self, event):
-        # Try to infer speaker/role from available event fields
-        role = None
-        if hasattr(event, "speaker_id") and getattr(event, "speaker_id"):
-            role = "USER"
-        elif hasattr(event, "role") and getattr(event, "role"):
-            role = getattr(event, "role").upper()
-        else:
-            # Fall back to is_final heuristic (not ideal)
-            role = "USER" if getattr(event, "is_final", False) else "AGENT"
-
-        # Prefer common text fields
-        text = getattr(event, "text", None) or getattr(event, "transcript", None) or getattr(event, "user_transcript", None) or ""
-        line = f"[{role}] {text}"
-        print(line)  # show in terminal
-        self.transcript.append(line)  # store for file
+    def enqueue_transcript_event(self, handler, event) -> None:
+        if self._transcript_closed:
+            return  # arrived after the notes were flushed for saving
+        queue = self._transcript_queue
+        if queue.full():
+            # backpressure: event callbacks cannot await, so the producer pays for the
+            # backlog itself instead of dropping events or letting the queue grow
+            self.transcript_stats["inline_drains"] += 1
+            self.handle_transcript_batch(self.take_transcript_batch(queue.qsize()))
+        queue.put_nowait((handler, event))
+        self.transcript_stats["max_depth"] = max(self.transcript_stats["max_depth"], queue.qsize())
+
+    def take_transcript_batch(self, limit: int) -> list:
+        batch = []
+        while len(batch) < limit and not self._transcript_queue.empty():
+            batch.append(self._transcript_queue.get_nowait())
+            self._transcript_queue.task_done()
+        return batch
+
+    def handle_transcript_batch(self, batch: list) -> None:
+        for handler, event in batch:
+            try:
+                handler(event)
+            except Exception:
+                print("Error handling transcript event")
+        self.transcript_stats["events"] += len(batch)
+        self.transcript_stats["batches"] += 1
+
+    async def consume_transcript_events(self):
+        while True:
+            first = await self._transcript_queue.get()
+            self._transcript_queue.task_done()
+            if first is None:
+                return
+            batch = [first] + self.take_transcript_batch(TRANSCRIPT_BATCH_SIZE - 1)
+            stop = batch[-1] is None
+            self.handle_transcript_batch([entry for entry in batch if entry is not None])
+            if stop:
+                return
 
-    async def on_conversation_item(self, event):
+    def flush_transcript(self) -> asyncio.Future:
+        """Handle every queued transcript event and stop the consumer.
+
+        Every caller awaits the same flush, so none of them returns while the
+        consumer is still draining.
+        """
+        if self._transcript_flush is None:
+            self._transcript_closed = True
+            self._transcript_flush = asyncio.create_task(self._flush_transcript())
+        return asyncio.shield(self._transcript_flush)
+
+    async def _flush_transcript(self):
+        consumer = self._transcript_consumer
+        if consumer is None or consumer.done():
+            self.handle_transcript_batch(self.take_transcript_batch(self._transcript_queue.qsize()))
+        else:
+            if self._transcript_queue.full():
+                self.handle_transcript_batch(self.take_transcript_batch(self._transcript_queue.qsize()))
+            self._transcript_queue.put_nowait(None)
+            await consumer
+        stats = self.transcript_stats
+        print(
+            f"📜 Transcript events: {stats['events']} in {stats['batches']} batches, "
+            f"max queue depth {stats['max_depth']}, inline drains {stats['inline_drains']}"
+        )
+
+    def record(self, event: TranscriptEvent) -> None:
+        print(event.line())  # show in terminal
+        self.transcript.append(event)  # store for file
+
+    def on_transcript(self, event):
+        # speech-to-text results are always the user's; interim ones are coalesced until final
+        text = getattr(event, "transcript", None) or getattr(event, "text", None) or ""
+        timestamp = getattr(event, "created_at", None) or time.time()
+        final = bool(getattr(event, "is_final", False))
+        record = self.transcript_log.transcribed(USER, text, final, timestamp)
+        if record is not None:
+            self.record(record)
+
+    def on_conversation_item(self, event):
         # conversation items can contain multiple types of content; extract text pieces
         try:
             item = getattr(event, "item", None)
             if not item:
                 return
 
-            role = getattr(item, "role", "AGENT").upper()
+            pieces = []
             # content may be a list of strings or content objects
             for content in getattr(item, "content", []) or []:
                 if isinstance(content, str):
-                    line = f"[{role}] {content}"
-                    print(line)
-                    self.transcript.append(line)
+                    pieces.append(content)
                 else:
                     # some content types expose a transcript property
                     txt = getattr(content, "transcript", None)
                     if txt:
-                        line = f"[{role}] {txt}"
-                        print(line)
-                        self.transcript.append(line)
+                        pieces.append(txt)
+            record = self.transcript_log.item(
+                getattr(item, "id", None),
+                normalize_role(getattr(item, "role", None)),
+                " ".join(pieces),
+                getattr(item, "created_at", None) or time.time(),
+            )
+            if record is not None:
+                self.record(record)
         except Exception:
             print("Error handling conversation item event")
 
+    @function_tool
+    async def search_notes(self, context: RunContext, query: str):
+        """Use this tool to find information in the notes saved from the user's earlier sessions.
+
+        Returns the best-matching notes with their date and a short excerpt. If nothing
+        matches, tell the user you could not find it in their notes.
+
+        Args:
+            query: Key words to look for, e.g. "dentist appointment" or "budget review"
+        """
+        hits = await asyncio.to_thread(self.notes_search.search, query)
+        if not hits:
+            return "No saved notes match that."
+        lines = []
+        for name, excerpt in hits:
+            started = note_started(name)
+            when = started.strftime("%A %B %d %Y, %H:%M") if started else name
+            lines.append(f"{when}: {excerpt}")
+        return "\n".join(lines)
+
     async def on_user_turn_completed(self, turn_ctx, new_message):
         text = (new_message.text_content or "").lower()
 
@@ -151,21 +294,29 @@ class NotesAgent(Agent):
             except Exception:
                 print("Warning: failed to disconnect room from agent")
 
-            # Wait for any pending transcript tasks to complete so save_notes captures them
-            if self._pending_transcript_tasks:
-                try:
-                    await asyncio.gather(*list(self._pending_transcript_tasks), return_exceptions=True)
-                except Exception:
-                    print("Warning: error while awaiting pending transcript tasks")
+            # Handle every queued transcript event so save_notes captures them
+            await self.flush_transcript()
+
+@functools.cache
+def open_archive() -> NotesArchive | None:
+    # one archive per worker process, shared by the jobs it runs
+    return NotesArchive(ARCHIVE_DIR) if NOTES_ARCHIVE else None
+
 
-async def save_notes(transcript: list[str]):
-    # Save notes relative to this script so files are predictable regardless of CWD
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    notes_dir = os.path.join(base_dir, "notes")
-    print(f"Saving notes to directory: {notes_dir}")
-    os.makedirs(notes_dir, exist_ok=True)
+def write_notes(journal_path: str) -> tuple[str, int]:
+    """Turn a journal into a notes file named after the session's start, then remove the journal.
 
-    filename = datetime.now().strftime(os.path.join(notes_dir, "%Y-%m-%d_%H-%M-%S.txt"))
+    The name comes from the journal itself, so finishing a journal again after a
+    failure (here or in recover_notes) rewrites the same notes file instead of
+    adding a second one.
+    """
+    print(f"Saving notes to directory: {NOTES_DIR}")
+    os.makedirs(NOTES_DIR, exist_ok=True)
+
+    started = journal_started(journal_path)
+    filename = started.strftime(os.path.join(NOTES_DIR, "%Y-%m-%d_%H-%M-%S.txt"))
+    records = read_journal_records(journal_path)
+    transcript = [journal_line(record) for record in records]
 
     # If transcript is empty, still create a short file explaining no content was captured
     if not transcript:
@@ -173,20 +324,60 @@ async def save_notes(transcript: list[str]):
     else:
         contents = "\n".join(transcript)
 
-    with open(filename, "w", encoding="utf-8") as f:
+    tmp_path = f"{filename}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
         f.write(contents)
+    os.replace(tmp_path, filename)
+    archive = open_archive()
+    if archive is not None:
+        # before the journal goes away, so a crash here is retried by recover_notes
+        session = os.path.splitext(os.path.basename(filename))[0]
+        archive.append(session, with_latency(records), started.timestamp())
+    os.remove(journal_path)
+    return filename, len(transcript)
+
+
+async def save_notes(transcript: TranscriptJournal, notes_search: NotesSearch):
+    # the journal already holds every line; finalizing runs off the event loop
+    if not os.path.exists(transcript.path):
+        return  # already saved
+    await asyncio.to_thread(transcript.close)
+    if not os.path.exists(transcript.path):
+        return
+    filename, lines = await asyncio.to_thread(write_notes, transcript.path)
+    print(f"💾 Notes saved to: {filename} (lines: {lines})")
+    try:
+        await asyncio.to_thread(notes_search.add, filename)
+    except Exception:
+        print("Warning: failed to index saved notes; they are picked up when the next session starts")
+
 
-    print(f"💾 Notes saved to: {filename} (lines: {len(transcript)})")
+async def recover_notes(notes_search: NotesSearch):
+    """Finalize journals of sessions that were killed before they could save their notes."""
+
+    def recover() -> list[tuple[str, int]]:
+        saved = []
+        for path in claim_orphaned_journals(JOURNAL_DIR):
+            saved.append(write_notes(path))
+        return saved
+
+    for filename, lines in await asyncio.to_thread(recover):
+        print(f"💾 Recovered notes from an unfinished session: {filename} (lines: {lines})")
+    # also picks up recovered notes and anything added or edited by hand since the last session
+    await asyncio.to_thread(notes_search.sync)
 
 
 async def entrypoint(ctx: JobContext):
+    startup = StartupTimer(ctx)
     await ctx.connect()
+    startup.mark("connected")
+    notes_search = await asyncio.to_thread(NotesSearch)
 
     stop_event = asyncio.Event()
-    transcript: list[str] = []
+    transcript = TranscriptJournal(JOURNAL_DIR, fsync_interval=JOURNAL_FSYNC_SECONDS)
 
     session = AgentSession(
-        vad=silero.VAD.load(),
+        vad=await job_vad(ctx),
         stt=openai.STT(model=os.getenv("OPENAI_STT_MODEL", "gpt-4o-mini-transcribe")),
         llm=openai.LLM(model=os.getenv("OPENAI_LLM_MODEL", "gpt-4o-mini")),
         tts=openai.TTS(
@@ -195,11 +386,35 @@ async def entrypoint(ctx: JobContext):
         ),
     )
 
+    # built before the shutdown callback is registered, which flushes its transcript
+    agent = NotesAgent(ctx, stop_event, transcript, notes_search)
+
+    # A room disconnect runs the finally block below and the shutdown callbacks at the
+    # same time; both wait on one task so the notes are flushed and written exactly once.
+    finishing: asyncio.Task | None = None
+    recovery: asyncio.Task | None = None
+
+    async def finish_session():
+        await agent.flush_transcript()
+        if recovery is not None:
+            try:
+                await recovery
+            except Exception:
+                print("Warning: failed to recover notes from unfinished sessions")
+        await save_notes(transcript, notes_search)
+
+    def finish() -> asyncio.Future:
+        nonlocal finishing
+        if finishing is None:
+            finishing = asyncio.create_task(finish_session())
+        # a caller being cancelled must not cancel the save the other one waits for
+        return asyncio.shield(finishing)
+
     # Register a shutdown callback to ensure notes are saved even on external termination
     async def _save_on_shutdown():
         print("Shutdown callback: saving notes...")
         try:
-            await save_notes(transcript)
+            await finish()
         except Exception:
             print("Error while saving notes in shutdown callback")
 
@@ -210,11 +425,15 @@ async def entrypoint(ctx: JobContext):
         # In that case, save_notes will still run in the finally block below.
         pass
 
+    startup.attach(session)
     await session.start(
-        agent=NotesAgent(ctx, stop_event, transcript),
+        agent=agent,
         room=ctx.room,
         room_output_options=RoomOutputOptions(sync_transcription=True),
     )
+    startup.mark("session_started")
+    # recovering unfinished sessions and syncing the indexes can wait until after the greeting
+    recovery = asyncio.create_task(recover_notes(notes_search))
 
     async def on_disconnected(_):
         stop_event.set()
@@ -227,8 +446,8 @@ async def entrypoint(ctx: JobContext):
         print("🔄 Shutting down and saving notes...")
         await ctx.room.disconnect()
         await asyncio.sleep(0.2)  # give LiveKit time to clean up
-        await save_notes(transcript)
+        await finish()
 
 
 if __name__ == "__main__":
-    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint))
+    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
@@ -0,0 +1,265 @@
+"""SQLite FTS5 full-text index over the session notes in ``notes/``.
+
+Each ``.txt`` file is one row, keyed by its file name and tagged with the
+size and mtime it had when indexed, so the index can be kept up to date one
+file at a time and checked against the directory without re-reading it:
+
+    uv run notes_index.py rebuild
+    uv run notes_index.py verify
+    uv run notes_index.py search "quarterly budget"
+"""
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+
+NOTES_SUFFIX = ".txt"
+INDEX_NAME = ".index.sqlite3"
+
+_WORD = re.compile(r"\w+")
+# function words (and the transcript's role tags) say nothing about what a note is about;
+# with only a handful of notes, ranking alone cannot tell
+STOP_WORDS = frozenset(
+    "a about an and are as at be but by did do does for from had has have i in is it its me my of on or so"
+    " that the their them there they this to was we were what when which who will with you your"
+    " user agent".split()
+)
+
+
+@dataclass
+class NoteHit:
+    name: str
+    started: datetime | None
+    snippet: str
+
+
+def note_started(name: str) -> datetime | None:
+    try:
+        return datetime.strptime(name, f"%Y-%m-%d_%H-%M-%S{NOTES_SUFFIX}")
+    except ValueError:
+        return None
+
+
+def match_query(text: str) -> str:
+    """Turn free text into an FTS5 query that matches any of its words.
+
+    Every word is quoted, so punctuation and FTS5 keywords in what the user
+    said can never produce a syntax error; bm25 ranks notes that contain more
+    of the words (and rarer ones) first. Stop words are dropped unless the
+    query has nothing else.
+    """
+    words = list(dict.fromkeys(word.lower() for word in _WORD.findall(text)))
+    words = [word for word in words if word not in STOP_WORDS] or words
+    return " OR ".join(f'"{word}"' for word in words)
+
+
+class NotesIndex:
+    """Full-text index of the notes directory, updated one file at a time.
+
+    One connection is shared by all threads of the worker, like the summary
+    cache; WAL lets a lookup run while a finished session is being added.
+    """
+
+    def __init__(self, notes_dir: str, path: str | None = None):
+        self.notes_dir = notes_dir
+        self.path = path or os.path.join(notes_dir, INDEX_NAME)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " id INTEGER PRIMARY KEY,"
+            " name TEXT NOT NULL UNIQUE,"
+            " size INTEGER NOT NULL,"
+            " mtime_ns INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS notes USING fts5(body, tokenize='porter unicode61')")
+
+    def _note_files(self) -> dict[str, os.stat_result]:
+        if not os.path.isdir(self.notes_dir):
+            return {}
+        found = {}
+        for entry in os.scandir(self.notes_dir):
+            if entry.is_file() and entry.name.endswith(NOTES_SUFFIX):
+                found[entry.name] = entry.stat()
+        return found
+
+    def _indexed(self) -> dict[str, tuple[int, int]]:
+        rows = self._conn.execute("SELECT name, size, mtime_ns FROM files").fetchall()
+        return {name: (size, mtime_ns) for name, size, mtime_ns in rows}
+
+    def _put(self, name: str) -> None:
+        path = os.path.join(self.notes_dir, name)
+        with open(path, encoding="utf-8", errors="replace") as f:
+            body = f.read()
+        stat = os.stat(path)
+        row = self._conn.execute("SELECT id FROM files WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            cursor = self._conn.execute(
+                "INSERT INTO files (name, size, mtime_ns) VALUES (?, ?, ?)", (name, stat.st_size, stat.st_mtime_ns)
+            )
+            self._conn.execute("INSERT INTO notes (rowid, body) VALUES (?, ?)", (cursor.lastrowid, body))
+        else:
+            self._conn.execute(
+                "UPDATE files SET size = ?, mtime_ns = ? WHERE id = ?", (stat.st_size, stat.st_mtime_ns, row[0])
+            )
+            self._conn.execute("UPDATE notes SET body = ? WHERE rowid = ?", (body, row[0]))
+
+    def _drop(self, name: str) -> None:
+        row = self._conn.execute("SELECT id FROM files WHERE name = ?", (name,)).fetchone()
+        if row is not None:
+            self._conn.execute("DELETE FROM notes WHERE rowid = ?", (row[0],))
+            self._conn.execute("DELETE FROM files WHERE id = ?", (row[0],))
+
+    def add(self, path: str) -> None:
+        """Index (or re-index) one notes file, e.g. right after it was saved."""
+        name = os.path.basename(path)
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._put(name)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def sync(self) -> tuple[int, int]:
+        """Bring the index up to date with the directory; returns (added or updated, removed).
+
+        Only files whose size or mtime changed are read again.
+        """
+        with self._lock:
+            on_disk = self._note_files()
+            indexed = self._indexed()
+            changed = [
+                name
+                for name, stat in on_disk.items()
+                if indexed.get(name) != (stat.st_size, stat.st_mtime_ns)
+            ]
+            removed = [name for name in indexed if name not in on_disk]
+            if not changed and not removed:
+                return 0, 0
+            self._conn.execute("BEGIN")
+            try:
+                for name in changed:
+                    self._put(name)
+                for name in removed:
+                    self._drop(name)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return len(changed), len(removed)
+
+    def rebuild(self) -> int:
+        """Drop everything and index the directory from scratch; returns the number of notes."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute("DELETE FROM files")
+                self._conn.execute("DELETE FROM notes")
+                names = sorted(self._note_files())
+                for name in names:
+                    self._put(name)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            self._conn.execute("INSERT INTO notes (notes) VALUES ('optimize')")
+        return len(names)
+
+    def verify(self) -> list[str]:
+        """Return a description of every way the index disagrees with the directory."""
+        problems = []
+        with self._lock:
+            try:
+                self._conn.execute("INSERT INTO notes (notes) VALUES ('integrity-check')")
+            except sqlite3.DatabaseError as exc:
+                problems.append(f"full-text index is corrupt: {exc}")
+            (orphans,) = self._conn.execute(
+                "SELECT COUNT(*) FROM notes WHERE rowid NOT IN (SELECT id FROM files)"
+            ).fetchone()
+            if orphans:
+                problems.append(f"{orphans} indexed bodies belong to no file")
+            on_disk = self._note_files()
+            indexed = self._indexed()
+        for name in sorted(on_disk.keys() - indexed.keys()):
+            problems.append(f"not indexed: {name}")
+        for name in sorted(indexed.keys() - on_disk.keys()):
+            problems.append(f"indexed but missing on disk: {name}")
+        for name in sorted(on_disk.keys() & indexed.keys()):
+            stat = on_disk[name]
+            if indexed[name] != (stat.st_size, stat.st_mtime_ns):
+                problems.append(f"changed since indexed: {name}")
+        return problems
+
+    def search(self, query: str, limit: int = 5) -> list[NoteHit]:
+        """Best-matching notes for ``query``, most relevant first."""
+        expression = match_query(query)
+        if not expression:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT files.name, snippet(notes, 0, '', '', ' … ', 24) FROM notes"
+                " JOIN files ON files.id = notes.rowid"
+                " WHERE notes MATCH ? ORDER BY bm25(notes) LIMIT ?",
+                (expression, limit),
+            ).fetchall()
+        return [NoteHit(name, note_started(name), snippet) for name, snippet in rows]
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM files").fetchone()
+        return count
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Maintain the full-text index of saved notes.")
+    parser.add_argument("command", choices=["rebuild", "sync", "verify", "search"])
+    parser.add_argument("query", nargs="?", default="", help="Text to look for with the search command")
+    parser.add_argument(
+        "--notes-dir",
+        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "notes"),
+        help="Directory of saved notes (default: notes/ next to this script)",
+    )
+    parser.add_argument("--index", default=None, help="Index database (default: <notes-dir>/.index.sqlite3)")
+    parser.add_argument("--limit", type=int, default=5, help="Results shown by the search command")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    index = NotesIndex(args.notes_dir, args.index)
+    try:
+        if args.command == "rebuild":
+            print(f"Indexed {index.rebuild()} notes into {index.path}")
+        elif args.command == "sync":
+            updated, removed = index.sync()
+            print(f"Updated {updated} notes, removed {removed}; {len(index)} indexed")
+        elif args.command == "verify":
+            problems = index.verify()
+            for problem in problems:
+                print(problem)
+            if problems:
+                print(f"{len(problems)} problems; run 'rebuild' or 'sync' to fix them", file=sys.stderr)
+                sys.exit(1)
+            print(f"Index is up to date ({len(index)} notes)")
+        else:
+            for hit in index.search(args.query, args.limit):
+                print(f"{hit.name}: {hit.snippet}")
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""Append-only, crash-safe journal of a notes session's transcript.
+
+Each final transcript record is queued by the caller and written by a
+background thread as one JSON line, so the event loop never blocks on disk
+I/O. A record may correct an earlier one with the same id, or replace
+provisional STT records; ``read_journal`` applies those in order. The file
+is fsync'd at most every ``fsync_interval`` seconds; a hard kill loses at
+most that much. A journal that is still on disk when no process holds its
+lock belongs to a session that never finished and can be finalized later.
+"""
+import json
+import os
+import queue
+import re
+import threading
+import time
+from collections.abc import Iterator
+from datetime import datetime
+
+import file_lock
+from transcript_events import TranscriptEvent
+
+JOURNAL_SUFFIX = ".journal"
+
+_STOP = object()
+_LEGACY_LINE = re.compile(r"\[(\w+)\] (.*)", re.DOTALL)
+
+
+class TranscriptJournal:
+    """One session's journal, named after its start time and locked while open."""
+
+    def __init__(self, directory: str, fsync_interval: float = 1.0):
+        os.makedirs(directory, exist_ok=True)
+        self.started = datetime.now()
+        name = f"{self.started.strftime('%Y-%m-%d_%H-%M-%S-%f')}_{os.getpid()}{JOURNAL_SUFFIX}"
+        self.path = os.path.join(directory, name)
+        self.fsync_interval = fsync_interval
+        self.lines = 0
+        self._file = open(self.path, "a", encoding="utf-8")
+        file_lock.lock(self._file.fileno(), blocking=False)
+        self._queue: queue.Queue = queue.Queue()
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._writer = threading.Thread(target=self._write_loop, name="notes-journal", daemon=True)
+        self._writer.start()
+
+    def append(self, event: TranscriptEvent) -> None:
+        """Queue one transcript record; never blocks on disk."""
+        if self._closed:
+            raise ValueError("journal is closed")
+        self.lines += 1
+        record = {"ts": event.timestamp, "id": event.item_id, "role": event.role, "text": event.text}
+        if event.replaces:
+            record["replaces"] = list(event.replaces)
+        self._queue.put(record)
+
+    def _write_loop(self) -> None:
+        last_sync = time.monotonic()
+        dirty = False
+        while True:
+            timeout = max(0.0, last_sync + self.fsync_interval - time.monotonic()) if dirty else None
+            try:
+                batch = [self._queue.get(timeout=timeout)]
+            except queue.Empty:
+                batch = []
+            # drain whatever else is already waiting so one flush covers the burst
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = any(item is _STOP for item in batch)
+            records = [json.dumps(item, ensure_ascii=False) for item in batch if item is not _STOP]
+            if records:
+                self._file.write("\n".join(records) + "\n")
+                self._file.flush()
+                dirty = True
+            if dirty and (stop or time.monotonic() - last_sync >= self.fsync_interval):
+                os.fsync(self._file.fileno())
+                last_sync = time.monotonic()
+                dirty = False
+            if stop:
+                return
+
+    def close(self) -> None:
+        """Write and fsync everything queued so far, then release the file.
+
+        A second caller waits until the first has finished, so it never sees a
+        journal that is closed but not yet fully written.
+        """
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+            self._writer.join()
+            self._file.close()
+
+
+def read_journal_records(path: str) -> list[dict]:
+    """The journal's transcript as ``{"ts", "role", "text"}`` records, one per utterance, in order.
+
+    A later record with the same id corrects the earlier one in place, and
+    one that replaces provisional STT records takes the place of the first of
+    them. A record torn by a crash mid-write is skipped.
+    """
+    entries: list[dict | None] = []
+    positions: dict[str, int] = {}
+    with open(path, encoding="utf-8") as f:
+        for raw in f:
+            try:
+                record = json.loads(raw)
+                if "line" in record:  # written before records carried ids
+                    match = _LEGACY_LINE.match(record["line"])
+                    role, text = match.groups() if match else ("", record["line"])
+                    entries.append({"ts": record["ts"], "role": role, "text": text})
+                    continue
+                item_id = record["id"]
+                entry = {"ts": record["ts"], "role": record["role"], "text": record["text"]}
+            except (ValueError, KeyError, TypeError):
+                continue
+            if item_id in positions:
+                entries[positions[item_id]]["text"] = entry["text"]
+                continue
+            slot = None
+            for replaced in record.get("replaces", ()):
+                index = positions.pop(replaced, None)
+                if index is None:
+                    continue
+                if slot is None:
+                    slot = index
+                    entry["ts"] = entries[index]["ts"]
+                else:
+                    entries[index] = None
+            if slot is None:
+                slot = len(entries)
+                entries.append(entry)
+            else:
+                entries[slot] = entry
+            positions[item_id] = slot
+    return [entry for entry in entries if entry is not None]
+
+
+def journal_line(entry: dict) -> str:
+    return f"[{entry['role']}] {entry['text']}" if entry["role"] else entry["text"]
+
+
+def read_journal(path: str) -> Iterator[str]:
+    """Yield the journal's transcript lines, one per utterance, in order."""
+    for entry in read_journal_records(path):
+        yield journal_line(entry)
+
+
+def journal_started(path: str) -> datetime:
+    stamp = os.path.basename(path).rsplit("_", 1)[0]
+    try:
+        return datetime.strptime(stamp, "%Y-%m-%d_%H-%M-%S-%f")
+    except ValueError:
+        return datetime.fromtimestamp(os.path.getmtime(path))
+
+
+def claim_orphaned_journals(directory: str) -> Iterator[str]:
+    """Yield journals left behind by sessions that are no longer running, oldest first.
+
+    Each journal stays locked while the caller handles it, so two processes
+    recovering at once never finalize the same session twice. The caller is
+    expected to remove the journal once its notes are written.
+    """
+    if not os.path.isdir(directory):
+        return
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(JOURNAL_SUFFIX):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            continue
+        with f:
+            try:
+                file_lock.lock(f.fileno(), blocking=False)
+            except OSError:
+                continue  # a live session still holds it
+            # another recoverer may have finished this one while we waited to open it
+            if os.path.exists(path):
+                yield path
@@ -0,0 +1,359 @@
+"""Offline similarity index over the session notes in ``notes/``.
+
+Notes are embedded with a hashing vectorizer (words, word pairs and
+character n-grams hashed into a fixed number of signed buckets), so nothing
+needs to be trained or downloaded and a new note is added without touching
+the others. Vectors live in a memory-mapped float32 matrix with a sidecar
+table of the file each row came from; a query is one matrix-vector product.
+IDF weights come from per-bucket document counts and are applied to the
+query, which keeps stored rows valid as the archive grows:
+
+    uv run notes_vectors.py rebuild
+    uv run notes_vectors.py search "the budget thing from tuesday"
+"""
+import argparse
+import json
+import os
+import re
+import threading
+import zlib
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+import numpy as np
+
+import file_lock
+from notes_index import STOP_WORDS
+
+NOTES_SUFFIX = ".txt"
+INDEX_DIR = ".vectors"
+DEFAULT_DIM = 4096
+VECTORIZER = "hash-words-chars-v1"
+
+_WORD = re.compile(r"\w+")
+
+
+def features(text: str) -> Iterator[str]:
+    words = [word for word in _WORD.findall(text.lower()) if word not in STOP_WORDS]
+    for word in words:
+        yield word
+        # character n-grams let "budgets"/"budgeting" or "Q3"/"q3's" share buckets
+        padded = f"<{word}>"
+        for n in (3, 4):
+            for i in range(len(padded) - n + 1):
+                yield padded[i : i + n]
+    for first, second in zip(words, words[1:]):
+        yield f"{first} {second}"
+
+
+def vectorize(text: str, dim: int = DEFAULT_DIM) -> np.ndarray:
+    """Unit-length float32 vector of sublinear, signed hashed feature counts."""
+    hashes = np.fromiter(
+        (zlib.crc32(feature.encode("utf-8")) for feature in features(text)), dtype=np.uint32
+    )
+    vector = np.zeros(dim, dtype=np.float32)
+    if not len(hashes):
+        return vector
+    # the top bit picks the sign so colliding features tend to cancel rather than add up
+    signs = np.where(hashes >> 31, -1.0, 1.0).astype(np.float32)
+    np.add.at(vector, (hashes % dim).astype(np.intp), signs)
+    vector = np.sign(vector) * np.log1p(np.abs(vector))
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+def best_passage(text: str, query_vector: np.ndarray, max_chars: int = 240) -> str:
+    """The line of ``text`` most similar to the query, trimmed to ``max_chars``."""
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if not lines:
+        return ""
+    dim = len(query_vector)
+    scores = np.stack([vectorize(line, dim) for line in lines]) @ query_vector
+    best = lines[int(np.argmax(scores))]
+    return best if len(best) <= max_chars else best[: max_chars - 1] + "…"
+
+
+@dataclass
+class VectorHit:
+    name: str
+    score: float
+
+
+class NotesVectorIndex:
+    """Similarity index of the notes directory stored under ``<notes_dir>/.vectors``.
+
+    ``vectors.f32`` holds one ``dim``-wide row per indexed file and
+    ``ids.jsonl`` the matching (name, size, mtime) per row. Re-indexing a
+    changed file appends a new row and masks the old one; ``rebuild``
+    compacts. A crash between the two appends leaves an extra vector row,
+    which the next writer drops.
+
+    Every worker process opens its own instance on the same directory, so
+    each operation holds a file lock on ``.lock`` (exclusive for writes, shared
+    for searches) and first reloads the rows and document counts if another
+    process changed them.
+    """
+
+    def __init__(self, notes_dir: str, path: str | None = None, dim: int = DEFAULT_DIM):
+        self.notes_dir = notes_dir
+        self.path = path or os.path.join(notes_dir, INDEX_DIR)
+        self.dim = dim
+        self._lock = threading.Lock()
+        os.makedirs(self.path, exist_ok=True)
+        self._vectors_path = os.path.join(self.path, "vectors.f32")
+        self._ids_path = os.path.join(self.path, "ids.jsonl")
+        self._df_path = os.path.join(self.path, "df.npy")
+        self._meta_path = os.path.join(self.path, "meta.json")
+        self._lock_file = open(os.path.join(self.path, ".lock"), "a+b")
+        self._signature = ()  # matches no file state, so the first lock loads the index
+        try:
+            with self._locked():
+                pass
+        except BaseException:
+            self._lock_file.close()
+            raise
+
+    # ---- storage ----
+
+    @contextmanager
+    def _locked(self, exclusive: bool = True):
+        """Hold the thread lock and the cross-process lock, with in-memory state made current."""
+        with self._lock:
+            file_lock.lock(self._lock_file.fileno(), exclusive)
+            try:
+                signature = self._disk_signature()
+                if signature != self._signature:
+                    self._load(repair=exclusive)
+                yield
+            finally:
+                self._signature = self._disk_signature()
+                file_lock.unlock(self._lock_file.fileno())
+
+    def _disk_signature(self) -> tuple | None:
+        """Changes whenever any process appends to, rebuilds or repairs the index."""
+        try:
+            ids, vectors = os.stat(self._ids_path), os.stat(self._vectors_path)
+        except FileNotFoundError:
+            return None
+        return ids.st_ino, ids.st_size, ids.st_mtime_ns, vectors.st_ino, vectors.st_size
+
+    def _load(self, repair: bool) -> None:
+        """Read the index from disk; ``repair`` (exclusive lock only) resets or trims it."""
+        meta = {}
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+        if "dim" in meta and meta["dim"] != self.dim:
+            # other processes may be using the index at its own width; never reset it from under them
+            raise ValueError(
+                f"{self.path} holds {meta['dim']}-dimensional vectors, not {self.dim}; "
+                f"use --dim {meta['dim']}, or remove the directory to rebuild it"
+            )
+        if meta != {"dim": self.dim, "vectorizer": VECTORIZER}:
+            # new index or different vectorizer: the stored rows are meaningless, start over
+            if repair:
+                self._reset()
+            else:
+                self._rows, self._current, self._matrix = [], {}, None
+                self._df = np.zeros(self.dim, np.int64)
+            return
+        self._rows: list[dict] = []
+        ends = [0]  # byte offset in ids.jsonl after each row
+        if os.path.exists(self._ids_path):
+            with open(self._ids_path, "rb") as f:
+                for raw in f:
+                    if not raw.endswith(b"\n"):
+                        break  # torn last line
+                    try:
+                        self._rows.append(json.loads(raw))
+                    except ValueError:
+                        break
+                    ends.append(ends[-1] + len(raw))
+        row_bytes = self.dim * 4
+        stored = os.path.getsize(self._vectors_path) // row_bytes if os.path.exists(self._vectors_path) else 0
+        del self._rows[stored:]
+        if repair:
+            # safe only while no other process can be appending
+            with open(self._vectors_path, "ab") as f:
+                f.truncate(len(self._rows) * row_bytes)
+            with open(self._ids_path, "ab") as f:
+                f.truncate(ends[len(self._rows)])
+        self._df = np.load(self._df_path) if os.path.exists(self._df_path) else np.zeros(self.dim, np.int64)
+        self._current = {row["name"]: i for i, row in enumerate(self._rows)}
+        self._matrix = None
+
+    def _reset(self) -> None:
+        for path in (self._vectors_path, self._ids_path, self._df_path):
+            if os.path.exists(path):
+                os.remove(path)
+        open(self._vectors_path, "wb").close()
+        open(self._ids_path, "wb").close()
+        self._write_json(self._meta_path, {"dim": self.dim, "vectorizer": VECTORIZER})
+        self._rows = []
+        self._df = np.zeros(self.dim, np.int64)
+        self._current = {}
+        self._matrix = None
+
+    @staticmethod
+    def _write_json(path: str, value: dict) -> None:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(value, f)
+        os.replace(tmp_path, path)
+
+    def _save_df(self) -> None:
+        tmp_path = f"{self._df_path}.tmp.npy"
+        np.save(tmp_path, self._df)
+        os.replace(tmp_path, self._df_path)
+
+    def _append(self, entries: list[tuple[str, os.stat_result, np.ndarray]]) -> None:
+        with open(self._vectors_path, "ab") as f:
+            for _, _, vector in entries:
+                f.write(vector.astype(np.float32, copy=False).tobytes())
+        records = [{"name": name, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns} for name, stat, _ in entries]
+        with open(self._ids_path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(record) + "\n" for record in records))
+        matrix = self._open_matrix()
+        for record, (name, _, vector) in zip(records, entries):
+            previous = self._current.get(name)
+            if previous is not None:
+                self._df -= matrix[previous] != 0
+            self._df += vector != 0
+            self._current[name] = len(self._rows)
+            self._rows.append(record)
+        self._save_df()
+        self._matrix = None
+
+    def _open_matrix(self) -> np.ndarray:
+        if self._matrix is None:
+            if self._rows:
+                self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(len(self._rows), self.dim))
+            else:
+                self._matrix = np.zeros((0, self.dim), np.float32)
+        return self._matrix
+
+    def _embed(self, name: str) -> tuple[str, os.stat_result, np.ndarray]:
+        path = os.path.join(self.notes_dir, name)
+        with open(path, encoding="utf-8", errors="replace") as f:
+            text = f.read()
+        return name, os.stat(path), vectorize(text, self.dim)
+
+    def _note_files(self) -> dict[str, os.stat_result]:
+        if not os.path.isdir(self.notes_dir):
+            return {}
+        return {
+            entry.name: entry.stat()
+            for entry in os.scandir(self.notes_dir)
+            if entry.is_file() and entry.name.endswith(NOTES_SUFFIX)
+        }
+
+    # ---- public API ----
+
+    def add(self, path: str) -> None:
+        """Index (or re-index) one notes file, e.g. right after it was saved."""
+        entry = self._embed(os.path.basename(path))
+        with self._locked():
+            self._append([entry])
+
+    def sync(self) -> tuple[int, int]:
+        """Index new and changed notes; returns (added or updated, removed).
+
+        Deleting notes is rare, so a removal triggers a full rebuild instead
+        of tombstones.
+        """
+        with self._locked():
+            on_disk = self._note_files()
+            indexed = {row["name"]: row for row in (self._rows[i] for i in self._current.values())}
+            removed = [name for name in self._current if name not in on_disk]
+            if removed:
+                self._rebuild(on_disk)
+                return len(on_disk), len(removed)
+            changed = []
+            for name, stat in sorted(on_disk.items()):
+                row = indexed.get(name)
+                if row is None or (row.get("size"), row.get("mtime_ns")) != (stat.st_size, stat.st_mtime_ns):
+                    changed.append(name)
+            if changed:
+                self._append([self._embed(name) for name in changed])
+        return len(changed), 0
+
+    def rebuild(self) -> int:
+        """Re-embed the whole directory into a compact index; returns the number of notes."""
+        with self._locked():
+            on_disk = self._note_files()
+            self._rebuild(on_disk)
+        return len(on_disk)
+
+    def _rebuild(self, on_disk: dict[str, os.stat_result]) -> None:
+        self._reset()
+        if on_disk:
+            self._append([self._embed(name) for name in sorted(on_disk)])
+
+    def search(self, query: str, limit: int = 5) -> list[VectorHit]:
+        """Notes most similar to ``query``, best first (cosine similarity of IDF-weighted vectors)."""
+        query_vector = vectorize(query, self.dim)
+        # shared lock: the matmul reads the mapped file, which a rebuild elsewhere replaces
+        with self._locked(exclusive=False):
+            matrix = self._open_matrix()
+            live = np.fromiter(self._current.values(), dtype=np.intp, count=len(self._current))
+            documents = len(live)
+            if not documents:
+                return []
+            idf = np.log((1.0 + documents) / (1.0 + self._df)).astype(np.float32) + 1.0
+            rows = self._rows
+            weighted = query_vector * idf
+            norm = float(np.linalg.norm(weighted))
+            if not norm:
+                return []
+            scores = np.full(len(matrix), -np.inf, dtype=np.float32)
+            scores[live] = (matrix @ (weighted / norm))[live]
+        k = min(limit, documents)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [VectorHit(rows[i]["name"], float(scores[i])) for i in top if scores[i] > 0]
+
+    def query_vector(self, query: str) -> np.ndarray:
+        return vectorize(query, self.dim)
+
+    def __len__(self) -> int:
+        with self._locked(exclusive=False):
+            return len(self._current)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Maintain the similarity index of saved notes.")
+    parser.add_argument("command", choices=["rebuild", "sync", "search"])
+    parser.add_argument("query", nargs="?", default="", help="Text to look for with the search command")
+    parser.add_argument(
+        "--notes-dir",
+        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "notes"),
+        help="Directory of saved notes (default: notes/ next to this script)",
+    )
+    parser.add_argument("--index", default=None, help="Index directory (default: <notes-dir>/.vectors)")
+    parser.add_argument("--dim", type=int, default=DEFAULT_DIM, help="Hash buckets per vector; must match an existing index")
+    parser.add_argument("--limit", type=int, default=5, help="Results shown by the search command")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    try:
+        index = NotesVectorIndex(args.notes_dir, args.index, dim=args.dim)
+    except ValueError as exc:
+        raise SystemExit(str(exc))
+    if args.command == "rebuild":
+        print(f"Embedded {index.rebuild()} notes into {index.path}")
+    elif args.command == "sync":
+        updated, removed = index.sync()
+        print(f"Updated {updated} notes, removed {removed}; {len(index)} indexed")
+    else:
+        query_vector = index.query_vector(args.query)
+        for hit in index.search(args.query, args.limit):
+            with open(os.path.join(args.notes_dir, hit.name), encoding="utf-8", errors="replace") as f:
+                passage = best_passage(f.read(), query_vector)
+            print(f"{hit.name} ({hit.score:.2f}): {passage}")
+
+
+if __name__ == "__main__":
+    main()
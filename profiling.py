@@ -0,0 +1,107 @@
+import collections
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+# stages in pipeline order, so reports read top to bottom like a turn
+STAGES = ("connect", "record", "encode", "stt", "summary", "tts_first_byte", "tts_total", "playback")
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class SessionProfiler:
+    """Collect per-stage latencies and volume counters for one session.
+
+    Every observation is kept (a session is at most a few thousand samples),
+    so the report can give exact p50/p95/p99 per stage. Durations come from
+    ``time.perf_counter``; callers may attach bytes and audio-seconds to each
+    observation. ``count`` keeps plain event counters such as cache hits.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples: dict[str, list[float]] = collections.defaultdict(list)
+        self._bytes: collections.Counter = collections.Counter()
+        self._audio_seconds: collections.Counter = collections.Counter()
+        self.counters: collections.Counter = collections.Counter()
+
+    def record(self, stage: str, seconds: float, nbytes: int = 0, audio_seconds: float = 0.0) -> None:
+        with self._lock:
+            self._samples[stage].append(seconds)
+            self._bytes[stage] += nbytes
+            self._audio_seconds[stage] += audio_seconds
+
+    @contextmanager
+    def time(self, stage: str, nbytes: int = 0, audio_seconds: float = 0.0):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start, nbytes, audio_seconds)
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += n
+
+    def report(self) -> dict:
+        with self._lock:
+            samples = {stage: list(values) for stage, values in self._samples.items()}
+            nbytes = dict(self._bytes)
+            audio_seconds = dict(self._audio_seconds)
+            counters = dict(self.counters)
+
+        ordered = [s for s in STAGES if s in samples] + sorted(s for s in samples if s not in STAGES)
+        stages = {}
+        for stage in ordered:
+            values = np.asarray(samples[stage], dtype=np.float64)
+            entry = {
+                "count": int(values.size),
+                "total": float(values.sum()),
+                "max": float(values.max()),
+                "bytes": int(nbytes.get(stage, 0)),
+                "audio_seconds": float(audio_seconds.get(stage, 0.0)),
+            }
+            for q, value in zip(QUANTILES, np.quantile(values, QUANTILES)):
+                entry[f"p{round(q * 100)}"] = float(value)
+            stages[stage] = entry
+        return {"stages": stages, "counters": counters}
+
+    def to_json(self) -> str:
+        return json.dumps(self.report(), indent=2)
+
+    def to_prometheus(self, prefix: str = "voice_notes") -> str:
+        report = self.report()
+        lines = [
+            f"# HELP {prefix}_stage_seconds Latency of each pipeline stage.",
+            f"# TYPE {prefix}_stage_seconds summary",
+        ]
+        for stage, entry in report["stages"].items():
+            for q in QUANTILES:
+                lines.append(f'{prefix}_stage_seconds{{stage="{stage}",quantile="{q}"}} {entry[f"p{round(q * 100)}"]:.6f}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {entry["total"]:.6f}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {entry["count"]}')
+        lines += [f"# HELP {prefix}_stage_bytes_total Bytes moved by each stage.", f"# TYPE {prefix}_stage_bytes_total counter"]
+        lines += [f'{prefix}_stage_bytes_total{{stage="{s}"}} {e["bytes"]}' for s, e in report["stages"].items()]
+        lines += [
+            f"# HELP {prefix}_stage_audio_seconds_total Audio handled by each stage.",
+            f"# TYPE {prefix}_stage_audio_seconds_total counter",
+        ]
+        lines += [f'{prefix}_stage_audio_seconds_total{{stage="{s}"}} {e["audio_seconds"]:.3f}' for s, e in report["stages"].items()]
+        if report["counters"]:
+            lines += [f"# HELP {prefix}_events_total Session event counters.", f"# TYPE {prefix}_events_total counter"]
+            lines += [f'{prefix}_events_total{{event="{name}"}} {value}' for name, value in sorted(report["counters"].items())]
+        return "\n".join(lines) + "\n"
+
+    def format_table(self) -> str:
+        report = self.report()
+        rows = [f"{'stage':<15} {'n':>5} {'p50':>8} {'p95':>8} {'p99':>8} {'bytes':>11} {'audio s':>8}"]
+        for stage, e in report["stages"].items():
+            rows.append(
+                f"{stage:<15} {e['count']:>5} {e['p50']:>8.3f} {e['p95']:>8.3f} {e['p99']:>8.3f} "
+                f"{e['bytes']:>11} {e['audio_seconds']:>8.1f}"
+            )
+        for name, value in sorted(report["counters"].items()):
+            rows.append(f"{name}: {value}")
+        return "\n".join(rows)
@@ -6,7 +6,6 @@ from livekit.agents import (
     Agent,
     AgentSession,
     JobContext,
-    JobProcess,
     MetricsCollectedEvent,
     RoomInputOptions,
     RoomOutputOptions,
@@ -18,7 +17,7 @@ from livekit.agents import (
     ConversationItemAddedEvent,
 )
 from livekit.agents.llm import ImageContent, AudioContent
-from livekit.plugins import noise_cancellation, silero, openai
+from livekit.plugins import noise_cancellation, openai
 from livekit.plugins.turn_detector.multilingual import MultilingualModel
 from livekit.agents import ChatContext, ChatMessage
 from datetime import datetime
@@ -29,6 +28,7 @@ logger = logging.getLogger("agent")
 load_dotenv(".env.local")
 
 import instructions.realtime_voice_instruction as instructionlib
+from agent_startup import StartupTimer, job_vad, prewarm
 
 
 class Assistant(Agent):
@@ -72,11 +72,8 @@ class Assistant(Agent):
     #     return "sunny with a temperature of 70 degrees."
 
 
-def prewarm(proc: JobProcess):
-    proc.userdata["vad"] = silero.VAD.load()
-
-
 async def entrypoint(ctx: JobContext, instructions: str = ""):
+    startup = StartupTimer(ctx)
     # Logging setup
 
     # Add any other context you want in all log entries here
@@ -124,7 +121,7 @@ async def entrypoint(ctx: JobContext, instructions: str = ""):
     #     preemptive_generation=True,
     # )
     session = AgentSession(
-        vad=ctx.proc.userdata["vad"],
+        vad=await job_vad(ctx),
         # minimum delay for endpointing, used when turn detector believes the user is done with their turn
         min_endpointing_delay=0.5,
         # maximum delay for endpointing, used when turn detector does not believe the user is done with their turn
@@ -132,6 +129,7 @@ async def entrypoint(ctx: JobContext, instructions: str = ""):
         preemptive_generation=True,
         use_tts_aligned_transcript=True,
     )
+    startup.attach(session)
 
     # Metrics collection, to measure pipeline performance
     # For more information, see https://docs.livekit.io/agents/build/metrics/
@@ -209,12 +207,14 @@ async def entrypoint(ctx: JobContext, instructions: str = ""):
         room_output_options=RoomOutputOptions(sync_transcription=True),
         # video_enabled=isEnableVideo,
     )
+    startup.mark("session_started")
 
     # Join the room and connect to the user
     if isEnableVideo:
         await ctx.connect(auto_subscribe=AutoSubscribe.SUBSCRIBE_ALL)
     else:
         await ctx.connect(auto_subscribe=AutoSubscribe.AUDIO_ONLY)
+    startup.mark("connected")
 
 
 if __name__ == "__main__":
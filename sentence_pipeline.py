@@ -0,0 +1,131 @@
+import collections
+import queue
+import re
+import threading
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+
+from openai import OpenAI
+
+from api_client import ApiCaller, call_api
+
+# a sentence ends at ., ! or ? followed by whitespace, or at a line break (bullet lists)
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+class SentenceSplitter:
+    """Cut streamed text deltas into sentences as soon as each one is complete.
+
+    Fragments shorter than ``min_chars`` (list numbering, "e.g.") are merged
+    into the following sentence so TTS is not asked for tiny clips.
+    """
+
+    def __init__(self, min_chars: int = 20):
+        self.min_chars = min_chars
+        self._pending = ""
+
+    def feed(self, delta: str) -> list[str]:
+        self._pending += delta
+        sentences = []
+        start = 0
+        for match in _SENTENCE_END.finditer(self._pending):
+            sentence = self._pending[start:match.start()].strip()
+            if len(sentence) < self.min_chars:
+                continue
+            sentences.append(sentence)
+            start = match.end()
+        self._pending = self._pending[start:]
+        return sentences
+
+    def flush(self) -> list[str]:
+        rest = self._pending.strip()
+        self._pending = ""
+        return [rest] if rest else []
+
+
+def iter_summary_sentences(
+    client: OpenAI,
+    text: str,
+    model: str,
+    instruction: str,
+    api: ApiCaller | None = None,
+) -> Iterator[str]:
+    """Stream a summary from the Responses API, yielding complete sentences."""
+    splitter = SentenceSplitter()
+    stream = call_api(
+        api,
+        "summary",
+        lambda timeout: client.responses.create(
+            model=model,
+            input=[
+                {
+                    "role": "system",
+                    "content": instruction,
+                },
+                {"role": "user", "content": text},
+            ],
+            stream=True,
+            timeout=timeout,
+        ),
+    )
+    for event in stream:
+        if event.type == "response.output_text.delta":
+            yield from splitter.feed(event.delta)
+    yield from splitter.flush()
+
+
+def speak_sentences(
+    sentences: Iterator[str],
+    synthesize: Callable[[str], bytes],
+    play: Callable[[bytes], None],
+    max_in_flight: int = 3,
+    on_sentence: Callable[[int, str], None] | None = None,
+) -> list[str]:
+    """Synthesize sentences concurrently and play them back in order.
+
+    ``sentences`` is drained on a background thread so the summary keeps
+    streaming while earlier sentences are synthesized and played. At most
+    ``max_in_flight`` TTS requests run ahead of playback.
+    """
+    ready: queue.Queue = queue.Queue()
+    done = object()
+
+    def read_sentences() -> None:
+        try:
+            for sentence in sentences:
+                ready.put(sentence)
+        except BaseException as exc:  # surfaced on the playback thread
+            ready.put(exc)
+        ready.put(done)
+
+    reader = threading.Thread(target=read_sentences, name="summary-stream", daemon=True)
+    reader.start()
+
+    spoken: list[str] = []
+    pending: collections.deque = collections.deque()
+    finished = False
+    with ThreadPoolExecutor(max_workers=max(1, max_in_flight), thread_name_prefix="tts") as pool:
+        while True:
+            while not finished and len(pending) < max_in_flight:
+                try:
+                    # only block when there is nothing else to play yet
+                    item = ready.get(block=not pending)
+                except queue.Empty:
+                    break
+                if item is done:
+                    finished = True
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                if on_sentence is not None:
+                    on_sentence(len(spoken) + len(pending), item)
+                pending.append((item, pool.submit(synthesize, item)))
+
+            if not pending:
+                break
+            sentence, future = pending.popleft()
+            play(future.result())
+            spoken.append(sentence)
+
+    reader.join()
+    return spoken
@@ -0,0 +1,124 @@
+import queue
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+_STOP = object()
+
+
+@dataclass
+class TurnResult:
+    turn: int
+    transcript: str = ""
+    summary: str | None = None
+    done: bool = False
+    skipped: bool = False
+    error: BaseException | None = None
+
+
+class OverlappedSession:
+    """Capture the next note while the previous one is transcribed and summarized.
+
+    Capture runs on the calling thread. Each finished recording is handed to an
+    STT worker, whose transcripts feed a summary worker; both are single
+    threads fed by FIFO queues, so turns complete in the order they were
+    recorded. Results are only spoken between captures (never while the
+    microphone is open), oldest first. When a transcript contains a done
+    phrase the in-progress capture is aborted, later turns are discarded and
+    the session closes after everything before it has been spoken. ``capture``
+    may also set the stop event itself (a done phrase heard while recording);
+    the session then closes once the turns already in flight are spoken.
+    """
+
+    def __init__(
+        self,
+        capture: Callable[[threading.Event], Any | None],
+        transcribe: Callable[[Any], str],
+        summarize: Callable[[str], str],
+        is_done: Callable[[str], bool],
+        on_result: Callable[[TurnResult], None],
+        on_close: Callable[[], None],
+    ):
+        self.capture = capture
+        self.transcribe = transcribe
+        self.summarize = summarize
+        self.is_done = is_done
+        self.on_result = on_result
+        self.on_close = on_close
+        self.stop_event = threading.Event()
+        self._stt_queue: queue.Queue = queue.Queue()
+        self._summary_queue: queue.Queue = queue.Queue()
+        self._results: queue.Queue = queue.Queue()
+
+    def _stt_worker(self) -> None:
+        while True:
+            job = self._stt_queue.get()
+            if job is _STOP:
+                self._summary_queue.put(_STOP)
+                return
+            turn, audio = job
+            result = TurnResult(turn)
+            if self.stop_event.is_set():
+                result.skipped = True
+            else:
+                try:
+                    result.transcript = self.transcribe(audio)
+                    if result.transcript and self.is_done(result.transcript):
+                        result.done = True
+                        # abort the capture that is running for the next turn
+                        self.stop_event.set()
+                except BaseException as exc:
+                    result.error = exc
+            self._summary_queue.put(result)
+
+    def _summary_worker(self) -> None:
+        while True:
+            result = self._summary_queue.get()
+            if result is _STOP:
+                return
+            if result.transcript and not (result.done or result.skipped or result.error):
+                try:
+                    result.summary = self.summarize(result.transcript)
+                except BaseException as exc:
+                    result.error = exc
+            self._results.put(result)
+
+    def run(self) -> None:
+        workers = [
+            threading.Thread(target=self._stt_worker, name="stt-stage", daemon=True),
+            threading.Thread(target=self._summary_worker, name="summary-stage", daemon=True),
+        ]
+        for worker in workers:
+            worker.start()
+
+        turn = 0
+        in_flight = 0
+        try:
+            while True:
+                audio = None if self.stop_event.is_set() else self.capture(self.stop_event)
+                submitted = audio is not None and not self.stop_event.is_set()
+                if submitted:
+                    turn += 1
+                    self._stt_queue.put((turn, audio))
+                    in_flight += 1
+
+                # controlled speaking point: leave the newest turn processing in the
+                # background and speak everything older than it
+                while in_flight > (1 if submitted else 0):
+                    result = self._results.get()
+                    in_flight -= 1
+                    if result.error is not None:
+                        raise result.error
+                    if result.skipped:
+                        continue
+                    if result.done:
+                        self.on_close()
+                        return
+                    self.on_result(result)
+                if self.stop_event.is_set() and in_flight == 0:
+                    self.on_close()
+                    return
+        finally:
+            self.stop_event.set()
+            self._stt_queue.put(_STOP)
@@ -0,0 +1,92 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+# analysis frame length; 10 ms keeps short consonants from being averaged away
+FRAME_SECONDS = 0.01
+
+
+def frame_rms(samples: np.ndarray, frame_size: int) -> np.ndarray:
+    """Return the linear RMS of each full frame of a mono signal (vectorized)."""
+    usable = len(samples) - len(samples) % frame_size
+    if usable <= 0:
+        return np.zeros(1, dtype=np.float32)
+    frames = samples[:usable].reshape(-1, frame_size)
+    return np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+
+
+def frame_energy_db(block: np.ndarray, frame_size: int) -> np.ndarray:
+    """Return per-frame RMS energy in dBFS for a mono block (vectorized)."""
+    return 20.0 * np.log10(np.maximum(frame_rms(block, frame_size), 1e-6))
+
+
+def to_db(value: float) -> float:
+    return float(20.0 * np.log10(max(value, 1e-6)))
+
+
+@dataclass
+class GateResult:
+    speech: bool
+    voiced_seconds: float
+    peak_db: float
+    # RMS over the voiced frames only, so pauses do not drag the level down
+    speech_db: float
+
+
+def analyze_recording(
+    samples: np.ndarray,
+    samplerate: int,
+    threshold_db: float = -45.0,
+    min_speech_seconds: float = 0.25,
+) -> GateResult:
+    """Classify a recording as speech or silence/noise before anything is uploaded.
+
+    A recording counts as speech when at least ``min_speech_seconds`` of
+    10 ms frames are above ``threshold_db``; a lone click or bump passes the
+    energy test for a frame or two but not for a quarter of a second.
+    """
+    frame_size = max(1, int(samplerate * FRAME_SECONDS))
+    rms = frame_rms(samples, frame_size)
+    voiced = rms > 10 ** (threshold_db / 20)
+    voiced_seconds = float(np.count_nonzero(voiced)) * frame_size / samplerate
+    peak = float(np.max(np.abs(samples))) if samples.size else 0.0
+    speech_rms = float(np.sqrt(np.mean(np.square(rms[voiced])))) if voiced.any() else 0.0
+    return GateResult(
+        speech=voiced_seconds >= min_speech_seconds,
+        voiced_seconds=voiced_seconds,
+        peak_db=to_db(peak),
+        speech_db=to_db(speech_rms),
+    )
+
+
+def normalize_gain(
+    samples: np.ndarray,
+    gate: GateResult,
+    target_db: float = -20.0,
+    max_gain_db: float = 20.0,
+    peak_ceiling_db: float = -1.0,
+) -> np.ndarray:
+    """Boost quiet speech towards ``target_db`` without clipping; louder input is returned as is."""
+    gain_db = min(target_db - gate.speech_db, max_gain_db, peak_ceiling_db - gate.peak_db)
+    if gain_db <= 0.5:
+        return samples
+    return samples * np.float32(10 ** (gain_db / 20))
+
+
+def calibrate_threshold(
+    ambient: np.ndarray,
+    samplerate: int,
+    margin_db: float = 10.0,
+    floor_db: float = -65.0,
+    ceiling_db: float = -30.0,
+) -> float:
+    """Derive a speech threshold from a stretch of room noise.
+
+    The 90th percentile of frame energy is the loud end of the noise floor
+    (fans, hum); speech has to clear it by ``margin_db``. The result is
+    clamped so a silent interface or a talking user cannot produce an
+    unusable threshold.
+    """
+    frame_size = max(1, int(samplerate * FRAME_SECONDS))
+    noise_db = float(np.percentile(frame_energy_db(ambient, frame_size), 90))
+    return float(np.clip(noise_db + margin_db, floor_db, ceiling_db))
@@ -0,0 +1,68 @@
+import contextlib
+import time
+from dataclasses import dataclass
+
+from openai import OpenAI
+
+from api_client import ApiCaller, call_api
+from audio_engine import AudioEngine
+
+# the speech endpoint's "pcm" format: raw 24 kHz, 16-bit little-endian, mono
+PCM_SAMPLERATE = 24000
+PCM_SAMPLE_BYTES = 2
+
+
+@dataclass
+class StreamStats:
+    first_byte: float | None = None
+    first_audio: float | None = None
+    synthesis: float = 0.0
+    total: float = 0.0
+    bytes: int = 0
+    underruns: int = 0
+
+
+def stream_speech(
+    client: OpenAI,
+    text: str,
+    model: str,
+    voice: str,
+    player: AudioEngine,
+    chunk_size: int = 4096,
+    api: ApiCaller | None = None,
+) -> StreamStats:
+    """Synthesize ``text`` as PCM and play it while the response is still arriving."""
+    stats = StreamStats()
+    start = time.perf_counter()
+    player.buffer.begin()
+    try:
+        with contextlib.ExitStack() as stack:
+            # only opening the stream is retried; once bytes are playing a retry would repeat audio
+            response = call_api(
+                api,
+                "tts_stream",
+                lambda timeout: stack.enter_context(
+                    client.audio.speech.with_streaming_response.create(
+                        model=model,
+                        voice=voice,
+                        input=text,
+                        response_format="pcm",
+                        timeout=timeout,
+                    )
+                ),
+            )
+            for chunk in response.iter_bytes(chunk_size):
+                if stats.first_byte is None:
+                    stats.first_byte = time.perf_counter() - start
+                stats.bytes += len(chunk)
+                player.buffer.write(chunk)
+    finally:
+        player.buffer.close()
+    stats.synthesis = time.perf_counter() - start
+
+    player.buffer.wait()
+    stats.total = time.perf_counter() - start
+    if player.buffer.started_at is not None:
+        stats.first_audio = player.buffer.started_at - start
+    stats.underruns = player.buffer.underruns
+    return stats
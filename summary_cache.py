@@ -0,0 +1,77 @@
+import hashlib
+import sqlite3
+import threading
+import time
+
+
+class SummaryCache:
+    """SQLite cache of summaries keyed by (summary model, instruction, transcript).
+
+    Entries older than ``ttl_seconds`` are treated as misses and purged
+    (``0`` keeps them forever). A hit refreshes the entry's last-used time,
+    and once more than ``max_entries`` are stored the least recently used
+    ones are evicted. One connection is shared by all threads of a session.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 0.0, max_entries: int = 10000):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS summaries ("
+            " key TEXT PRIMARY KEY,"
+            " summary TEXT NOT NULL,"
+            " created REAL NOT NULL,"
+            " used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS summaries_used ON summaries (used)")
+
+    @staticmethod
+    def key(model: str, instruction: str, transcript: str) -> str:
+        digest = hashlib.sha256()
+        for part in (model, instruction, transcript):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, model: str, instruction: str, transcript: str) -> str | None:
+        key = self.key(model, instruction, transcript)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT summary, created FROM summaries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            summary, created = row
+            if self.ttl_seconds > 0 and now - created > self.ttl_seconds:
+                self._conn.execute("DELETE FROM summaries WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE summaries SET used = ? WHERE key = ?", (now, key))
+        return summary
+
+    def put(self, model: str, instruction: str, transcript: str, summary: str) -> None:
+        key = self.key(model, instruction, transcript)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries (key, summary, created, used) VALUES (?, ?, ?, ?)",
+                (key, summary, now, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        if self.ttl_seconds > 0:
+            self._conn.execute("DELETE FROM summaries WHERE created < ?", (now - self.ttl_seconds,))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM summaries").fetchone()
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM summaries WHERE key IN (SELECT key FROM summaries ORDER BY used LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,134 @@
+"""Compact transcript records for the LiveKit notes agent.
+
+A user turn reaches the agent twice: as speech-to-text results (a stream of
+interim hypotheses followed by one or more finals) and again as the chat
+message the session adds to the conversation. ``TranscriptLog`` folds both
+into one record per utterance: interim results are coalesced in place, STT
+finals are kept provisionally until the conversation item for the same
+role arrives (the agent's item may land first), and an item id that was
+already recorded with the same text is dropped.
+"""
+import re
+from collections import OrderedDict
+
+USER = "USER"
+AGENT = "AGENT"
+
+_SPACE = re.compile(r"\s+")
+
+
+def normalize_role(role: str | None) -> str:
+    role = (role or "").lower()
+    if role == "user":
+        return USER
+    if role in ("assistant", "agent", ""):
+        return AGENT
+    return role.upper()
+
+
+def _squash(text: str) -> str:
+    return _SPACE.sub(" ", text).strip().lower()
+
+
+class TranscriptEvent:
+    """One utterance; ``replaces`` lists provisional STT ids this record supersedes."""
+
+    __slots__ = ("item_id", "role", "timestamp", "final", "text", "replaces")
+
+    def __init__(self, item_id: str, role: str, timestamp: float, final: bool, text: str, replaces: tuple = ()):
+        self.item_id = item_id
+        self.role = role
+        self.timestamp = timestamp
+        self.final = final
+        self.text = text
+        self.replaces = replaces
+
+    def line(self) -> str:
+        return f"[{self.role}] {self.text}"
+
+    def __repr__(self) -> str:
+        state = "final" if self.final else "interim"
+        return f"TranscriptEvent({self.item_id!r}, {self.role}, {state}, {self.text!r})"
+
+
+class TranscriptLog:
+    """De-duplicates transcript events; only records worth persisting are returned.
+
+    Memory stays bounded: only the last ``keep`` final records are remembered
+    for de-duplication, since repeats of older items do not happen in practice.
+    STT finals that no item claims within ``claim_seconds`` stay as they were
+    written and are not folded into a later utterance.
+    """
+
+    def __init__(self, keep: int = 256, claim_seconds: float = 30.0):
+        self.keep = keep
+        self.claim_seconds = claim_seconds
+        self.coalesced = 0
+        self.duplicates = 0
+        self._events: OrderedDict[str, TranscriptEvent] = OrderedDict()
+        self._interim: dict[str, TranscriptEvent] = {}
+        self._unclaimed: dict[str, list[TranscriptEvent]] = {}
+        self._counter = 0
+
+    def _next_id(self, prefix: str) -> str:
+        self._counter += 1
+        return f"{prefix}-{self._counter}"
+
+    def _remember(self, event: TranscriptEvent) -> None:
+        self._events[event.item_id] = event
+        self._events.move_to_end(event.item_id)
+        while len(self._events) > self.keep:
+            self._events.popitem(last=False)
+
+    def transcribed(self, role: str, text: str, final: bool, timestamp: float) -> TranscriptEvent | None:
+        """Fold one STT result into the open utterance; returns it once it is final."""
+        text = text.strip()
+        if not text:
+            return None
+        event = self._interim.get(role)
+        if event is None:
+            event = TranscriptEvent(self._next_id("stt"), role, timestamp, False, text)
+            self._interim[role] = event
+        else:
+            event.text = text
+            self.coalesced += 1
+        if not final:
+            return None
+        del self._interim[role]
+        event.final = True
+        self._remember(event)
+        self._unclaimed.setdefault(role, []).append(event)
+        return event
+
+    def item(self, item_id: str | None, role: str, text: str, timestamp: float) -> TranscriptEvent | None:
+        """Record a conversation item; returns it unless it adds nothing new."""
+        text = text.strip()
+        if not text:
+            return None
+        known = self._events.get(item_id) if item_id else None
+        if known is not None:
+            if known.text == text:
+                self.duplicates += 1
+                return None
+            known.text = text
+            return known
+
+        # a new item settles this role's recent STT finals; other roles' wait for their own item
+        replaced = [e for e in self._unclaimed.pop(role, []) if timestamp - e.timestamp <= self.claim_seconds]
+        for other, pending in list(self._unclaimed.items()):
+            pending[:] = [e for e in pending if timestamp - e.timestamp <= self.claim_seconds]
+            if not pending:
+                del self._unclaimed[other]
+        event = TranscriptEvent(
+            item_id or self._next_id("item"),
+            role,
+            replaced[0].timestamp if replaced else timestamp,
+            True,
+            text,
+            tuple(e.item_id for e in replaced),
+        )
+        self._remember(event)
+        if replaced and _squash(" ".join(e.text for e in replaced)) == _squash(text):
+            self.duplicates += 1
+            return None
+        return event
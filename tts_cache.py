@@ -0,0 +1,80 @@
+import hashlib
+import os
+import tempfile
+
+
+class TTSCache:
+    """On-disk cache of synthesized speech keyed by (tts model, voice, text).
+
+    Entries are stored as ``<sha256>.wav`` files. A hit refreshes the file's
+    mtime, and once the directory grows past ``max_bytes`` the least recently
+    used entries are evicted.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 64 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(model: str, voice: str, text: str) -> str:
+        digest = hashlib.sha256()
+        for part in (model, voice, text):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _path(self, model: str, voice: str, text: str) -> str:
+        return os.path.join(self.directory, f"{self.key(model, voice, text)}.wav")
+
+    def get(self, model: str, voice: str, text: str) -> bytes | None:
+        path = self._path(model, voice, text)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def put(self, model: str, voice: str, text: str, data: bytes) -> None:
+        path = self._path(model, voice, text)
+        # write to a temp file and rename so a crash never leaves a truncated entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        self.evict(keep=path)
+
+    def evict(self, keep: str | None = None) -> None:
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith(".wav") or not entry.is_file():
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        entries.sort()
+        for _mtime, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
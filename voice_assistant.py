@@ -6,18 +6,18 @@ from livekit.agents import (
     Agent,
     AgentSession,
     JobContext,
-    JobProcess,
     MetricsCollectedEvent,
     RoomInputOptions,
     WorkerOptions,
     cli,
     metrics,
 )
-from livekit.plugins import noise_cancellation, silero, openai
+from livekit.plugins import noise_cancellation, openai
 # Turn detector import removed: not required because OpenAI STT handles language detection
 # from livekit.plugins.turn_detector.multilingual import MultilingualModel
 
 import instructions.realtime_voice_instruction as instructionlib
+from agent_startup import StartupTimer, job_vad, prewarm
 
 import os
 
@@ -87,17 +87,8 @@ class Assistant(Agent):
     #     return "sunny with a temperature of 70 degrees."
 
 
-def prewarm(proc: JobProcess):
-    try:
-        proc.userdata["vad"] = silero.VAD.load()
-        logger.info("Silero VAD prewarmed successfully")
-    except Exception:
-        logger.exception("Failed to prewarm Silero VAD")
-        # store a sentinel so callers can detect failure
-        proc.userdata["vad"] = None
-
-
 async def entrypoint(ctx: JobContext, instructions: str = ""):
+    startup = StartupTimer(ctx)
     # Logging setup
     # Add any other context you want in all log entries here
 
@@ -128,7 +119,7 @@ async def entrypoint(ctx: JobContext, instructions: str = ""):
     #     preemptive_generation=True,
     # )
     # Use the prewarmed VAD if available; log and continue if not
-    vad = ctx.proc.userdata.get("vad")
+    vad = await job_vad(ctx)
     if vad is None:
         logger.warning("VAD not available from prewarm; continuing without VAD (turn detection may be affected)")
 
@@ -140,6 +131,7 @@ async def entrypoint(ctx: JobContext, instructions: str = ""):
         max_endpointing_delay=5.0,
         preemptive_generation=True,
     )
+    startup.attach(session)
 
     # Metrics collection, to measure pipeline performance
     # For more information, see https://docs.livekit.io/agents/build/metrics/
@@ -175,6 +167,7 @@ async def entrypoint(ctx: JobContext, instructions: str = ""):
                 noise_cancellation=noise_cancellation.BVC(),
             ),
         )
+        startup.mark("session_started")
     except Exception:
         logger.exception("Failed to start AgentSession")
         # attempt a best-effort shutdown